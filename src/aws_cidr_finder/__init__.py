@@ -1,10 +1,17 @@
-from typing import Optional
+from typing import Iterable, Iterator, Optional, TYPE_CHECKING, Union
 
 from importlib_metadata import PackageNotFoundError, version
 
-from aws_cidr_finder import custom_types
-from aws_cidr_finder.boto_wrapper import BotoWrapper
+from aws_cidr_finder import core, custom_types, diff, validation
+from aws_cidr_finder.bitmap import OccupancyBitmap
+from aws_cidr_finder.cache import ResultCache
 from aws_cidr_finder.core import convert_to_json_format
+from aws_cidr_finder.metrics import Metrics
+from aws_cidr_finder.profiling import profile_iterable, profile_phase, Profiler
+from aws_cidr_finder.topology import to_vpc
+
+if TYPE_CHECKING:  # pragma: no cover
+    from aws_cidr_finder.boto_wrapper import BotoWrapper
 
 try:
     # We hard-code the name rather than using __name__ because the package name has an underscore
@@ -17,6 +24,56 @@ finally:
     del version, PackageNotFoundError
 
 JSONOutput = custom_types.JSONOutput
+VPCCIDRResult = custom_types.VPCCIDRResult
+VPC = custom_types.VPC
+VPCData = custom_types.VPCData
+
+
+def _create_boto_wrapper(
+    *,
+    profile_name: Optional[str],
+    region: Optional[str],
+    max_concurrency: Optional[int],
+    max_attempts: Optional[int],
+    connect_timeout: Optional[float],
+    read_timeout: Optional[float],
+    metrics: Optional[Metrics]
+) -> "BotoWrapper":
+    # Boto is imported lazily so that the functions in this module which do not talk to AWS (e.g.
+    # compute_available_cidrs) can be used without paying the cost of importing Boto
+    from aws_cidr_finder.boto_wrapper import BotoWrapper, DEFAULT_MAX_CONCURRENCY
+    return BotoWrapper(
+        profile_name=profile_name,
+        region=region,
+        max_concurrency=DEFAULT_MAX_CONCURRENCY if max_concurrency is None else max_concurrency,
+        max_attempts=max_attempts,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        metrics=metrics
+    )
+
+
+def _check_dual_stack(*, dual_stack: bool, desired_prefix: Optional[int]) -> None:
+    if dual_stack and desired_prefix is not None:
+        # A single prefix cannot sensibly apply to both IP versions (e.g. an IPv4-sized prefix would
+        # drop every available IPv6 CIDR block)
+        raise ValueError("desired_prefix cannot be used with dual_stack")
+
+
+def _iter_vpc_cidr_results(
+    results: Iterable[tuple[custom_types.SingleCIDRVPC, list[str], list[str], list[str]]]
+) -> Iterator[VPCCIDRResult]:
+    for vpc, cidrs, unconverted_cidrs, messages in results:
+        yield VPCCIDRResult(
+            id=vpc.id,
+            name=vpc.name,
+            cidr=vpc.cidr,
+            account=vpc.account,
+            region=vpc.region,
+            available_cidr_blocks=cidrs,
+            cidrs_not_converted_to_prefix=unconverted_cidrs,
+            messages=messages
+        )
 
 
 def find_available_cidrs(
@@ -24,7 +81,18 @@ def find_available_cidrs(
     profile_name: Optional[str] = None,
     region: Optional[str] = None,
     ipv6: bool = False,
-    desired_prefix: Optional[int] = None
+    desired_prefix: Optional[int] = None,
+    vpc_ids: Optional[list[str]] = None,
+    tags: Optional[dict[str, str]] = None,
+    max_concurrency: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+    connect_timeout: Optional[float] = None,
+    read_timeout: Optional[float] = None,
+    metrics: Optional[Metrics] = None,
+    cache: Optional[ResultCache] = None,
+    dual_stack: bool = False,
+    backend: str = "ranges",
+    profiler: Optional[Profiler] = None
 ) -> JSONOutput:
     """
     Finds the available CIDR blocks in all VPCs within the target AWS account and region, where the
@@ -41,12 +109,244 @@ def find_available_cidrs(
                            be converted. Any CIDR block encountered by this function that cannot
                            reasonably be converted to a CIDR block with this desired_prefix will be
                            written to the cidrs_not_converted_to_prefix field of the returned JSON.
+                           This cannot be combined with dual_stack.
+    :param vpc_ids: If given, only the VPCs with these IDs will be considered. The filtering is done
+                    by the AWS API, so other VPCs are never retrieved.
+    :param tags: If given, only the VPCs that have all of these tags (keyed by tag key, valued by
+                 tag value) will be considered. Like vpc_ids, this filtering is done by the AWS API.
+    :param max_concurrency: The maximum number of AWS API calls to make concurrently (10 by
+                            default). The size of the connection pool used to talk to the AWS API
+                            matches this value.
+    :param max_attempts: The maximum number of attempts (including the initial one) made for each
+                         AWS API call. Retries use Boto's adaptive retry mode.
+    :param connect_timeout: The number of seconds to wait when connecting to the AWS API.
+    :param read_timeout: The number of seconds to wait when reading a response from the AWS API.
+    :param metrics: If given, this object will be updated with the number of AWS API calls, retries,
+                    and throttles that occurred while running this function.
+    :param cache: If given, results are looked up in and added to this cache, so that only VPCs
+                  which are new or have changed since the cache was populated are computed. The
+                  cache's own metrics (if any) record its hits and misses. This function does not
+                  close the cache, so a cache with a path must be closed by the caller (or used in
+                  a with block) for all of its results to be persisted.
+    :param dual_stack: Whether to gather and output both IPv4 and IPv6 CIDR block data (in which
+                       case the ipv6 argument is ignored). Both are parsed from the same AWS API
+                       responses, so this makes half as many AWS API calls as calling this function
+                       once for each IP version. A ValueError is raised if this is combined with
+                       desired_prefix.
+    :param backend: See compute_available_cidrs.
+    :param profiler: If given, this object will record a cProfile profile of the retrieval of data
+                     from AWS and the computation of the available CIDR blocks, which can then be
+                     written to a file (see Profiler.dump) or summarized (see Profiler.print_top).
     :return: A JSON structure containing informational messages, unconverted CIDR blocks, and VPC
              data (which internally contains the available CIDR blocks of each corresponding VPC).
     """
 
-    boto = BotoWrapper(profile_name=profile_name, region=region)
-    subnet_cidr_gaps, cidrs_not_converted_to_prefix, messages = boto.get_subnet_cidr_gaps(
-        ipv6=ipv6, prefix=desired_prefix
+    _check_dual_stack(dual_stack=dual_stack, desired_prefix=desired_prefix)
+    with profile_phase(profiler):
+        boto = _create_boto_wrapper(
+            profile_name=profile_name,
+            region=region,
+            max_concurrency=max_concurrency,
+            max_attempts=max_attempts,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            metrics=metrics
+        )
+        subnet_cidr_gaps, cidrs_not_converted_to_prefix, messages = boto.get_subnet_cidr_gaps(
+            ipv6=ipv6,
+            prefix=desired_prefix,
+            vpc_ids=vpc_ids,
+            tags=tags,
+            cache=cache,
+            dual_stack=dual_stack,
+            backend=backend
+        )
+    return convert_to_json_format(subnet_cidr_gaps, cidrs_not_converted_to_prefix, messages)
+
+
+def iter_available_cidrs(
+    *,
+    profile_name: Optional[str] = None,
+    region: Optional[str] = None,
+    ipv6: bool = False,
+    desired_prefix: Optional[int] = None,
+    vpc_ids: Optional[list[str]] = None,
+    tags: Optional[dict[str, str]] = None,
+    max_concurrency: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+    connect_timeout: Optional[float] = None,
+    read_timeout: Optional[float] = None,
+    metrics: Optional[Metrics] = None,
+    cache: Optional[ResultCache] = None,
+    dual_stack: bool = False,
+    backend: str = "ranges",
+    profiler: Optional[Profiler] = None
+) -> Iterator[VPCCIDRResult]:
+    """
+    Lazily finds the available CIDR blocks in all VPCs within the target AWS account and region.
+    This accepts the same arguments as find_available_cidrs, but instead of returning a single JSON
+    structure once every VPC has been processed, it yields one VPCCIDRResult per VPC CIDR block as
+    soon as that VPC CIDR block has been processed. This allows callers to stream, filter, or stop
+    early without holding the results of every VPC in memory.
+
+    :return: An iterator of VPCCIDRResult objects, each of which contains the available CIDR blocks,
+             unconverted CIDR blocks, and informational messages of a single VPC CIDR block.
+    """
+
+    # This function is not a generator itself so that invalid arguments are reported as soon as it
+    # is called, whereas VPCs are only retrieved (and processed) once results are requested
+    _check_dual_stack(dual_stack=dual_stack, desired_prefix=desired_prefix)
+    core.check_backend(backend)
+    with profile_phase(profiler):
+        boto = _create_boto_wrapper(
+            profile_name=profile_name,
+            region=region,
+            max_concurrency=max_concurrency,
+            max_attempts=max_attempts,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            metrics=metrics
+        )
+    results = boto.iter_subnet_cidr_gaps(
+        ipv6=ipv6,
+        prefix=desired_prefix,
+        vpc_ids=vpc_ids,
+        tags=tags,
+        cache=cache,
+        dual_stack=dual_stack,
+        backend=backend
     )
+    return _iter_vpc_cidr_results(profile_iterable(results, profiler))
+
+
+def compute_available_cidrs(
+    vpcs: Iterable[Union[VPC, VPCData]],
+    *,
+    ipv6: bool = False,
+    desired_prefix: Optional[int] = None,
+    verify: bool = False,
+    cache: Optional[ResultCache] = None,
+    dual_stack: bool = False,
+    backend: str = "ranges",
+    profiler: Optional[Profiler] = None
+) -> JSONOutput:
+    """
+    Finds the available CIDR blocks in the given VPCs without talking to AWS. This is useful when
+    VPC and subnet data is already available from some other source (e.g. an inventory system), and
+    it does not require (or import) Boto.
+
+    :param vpcs: The VPCs to process, given either as VPC objects or as dicts with the keys id,
+                 name, cidrs, and subnets. CIDR blocks of the IP version not selected via the ipv6
+                 argument are ignored, so VPCs may contain both IPv4 and IPv6 CIDR blocks.
+    :param ipv6: Whether to output IPv6 CIDR block data (as opposed to IPv4 CIDR block data).
+    :param desired_prefix: See find_available_cidrs.
+    :param verify: Whether to check that the available CIDR blocks of each VPC cover exactly its
+                   free address space using the fewest possible CIDR blocks. A ValueError is raised
+                   if they do not.
+    :param cache: See find_available_cidrs.
+    :param dual_stack: Whether to output both IPv4 and IPv6 CIDR block data (in which case the ipv6
+                       argument is ignored). A ValueError is raised if this is combined with
+                       desired_prefix.
+    :param backend: How the free address space of each VPC is computed: "ranges" (the default) or
+                    "bitmap" (see OccupancyBitmap). Both produce the same results.
+    :param profiler: If given, this object will record a cProfile profile of the computation of the
+                     available CIDR blocks (see find_available_cidrs).
+    :return: The same JSON structure returned by find_available_cidrs.
+    """
+
+    _check_dual_stack(dual_stack=dual_stack, desired_prefix=desired_prefix)
+    subnet_cidr_gaps: dict[custom_types.SingleCIDRVPC, list[str]] = {}
+    cidrs_not_converted_to_prefix: list[str] = []
+    messages: list[str] = []
+
+    selected_vpcs = (
+        to_vpc(vpc) if dual_stack else core.select_ip_version(to_vpc(vpc), ipv6=ipv6)
+        for vpc in vpcs
+    )
+    results = core.iter_subnet_cidr_gaps(
+        selected_vpcs, prefix=desired_prefix, verify=verify, cache=cache, backend=backend
+    )
+    for vpc, cidrs, unconverted_cidrs, m in profile_iterable(results, profiler):
+        subnet_cidr_gaps[vpc] = cidrs
+        cidrs_not_converted_to_prefix += unconverted_cidrs
+        messages += m
+
     return convert_to_json_format(subnet_cidr_gaps, cidrs_not_converted_to_prefix, messages)
+
+
+def diff_available_cidrs(
+    old_vpcs: Iterable[Union[VPC, VPCData]],
+    new_vpcs: Iterable[Union[VPC, VPCData]],
+    *,
+    ipv6: bool = False
+) -> list[diff.VPCCIDRDiffData]:
+    """
+    Compares the available CIDR blocks of two snapshots of the same VPCs (e.g. yesterday's and
+    today's) without talking to AWS. Like compute_available_cidrs, this does not require Boto.
+
+    :param old_vpcs: The VPCs as they were previously, in the same form accepted by
+                     compute_available_cidrs.
+    :param new_vpcs: The VPCs as they are now, in the same form accepted by compute_available_cidrs.
+    :param ipv6: Whether to compare IPv6 CIDR blocks (as opposed to IPv4 CIDR blocks).
+    :return: One entry per VPC CIDR block whose available address space changed, containing the
+             minimal list of CIDR blocks that were freed and the minimal list of CIDR blocks that
+             were consumed. The status of each entry is "added" or "removed" if the VPC CIDR block
+             only exists in the new or old VPCs respectively, and "changed" otherwise.
+    """
+
+    old = [to_vpc(vpc) for vpc in old_vpcs]
+    new = [to_vpc(vpc) for vpc in new_vpcs]
+    return [
+        diff.convert_to_json_format(vpc, status, freed_cidrs, consumed_cidrs)
+        for vpc, status, freed_cidrs, consumed_cidrs in diff.diff_vpcs(old, new, ipv6=ipv6)
+    ]
+
+
+def validate_cidrs(
+    proposals: list[validation.CIDRProposal],
+    *,
+    vpcs: Optional[Iterable[Union[VPC, VPCData]]] = None,
+    profile_name: Optional[str] = None,
+    region: Optional[str] = None,
+    max_concurrency: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+    connect_timeout: Optional[float] = None,
+    read_timeout: Optional[float] = None,
+    metrics: Optional[Metrics] = None
+) -> list[validation.CIDRValidationData]:
+    """
+    Checks whether each of the given proposed subnet CIDR blocks could be created: it must be inside
+    a CIDR block of its VPC, and it must not overlap any existing subnet of its VPC or any other
+    proposed CIDR block in the same VPC. The existing VPCs and subnets are indexed once, so each
+    proposal is checked in logarithmic time.
+
+    :param proposals: The proposed CIDR blocks, given as dicts with the keys vpc_id and cidr. IPv4
+                      and IPv6 CIDR blocks may be mixed.
+    :param vpcs: If given, proposals are checked against these VPCs (in the same forms accepted by
+                 compute_available_cidrs) instead of against the VPCs in AWS, and Boto is not used.
+    :param profile_name: See find_available_cidrs. Only the VPCs referred to by the proposals are
+                         retrieved from AWS.
+    :param region: See find_available_cidrs.
+    :param max_concurrency: See find_available_cidrs.
+    :param max_attempts: See find_available_cidrs.
+    :param connect_timeout: See find_available_cidrs.
+    :param read_timeout: See find_available_cidrs.
+    :param metrics: See find_available_cidrs.
+    :return: One entry per proposal (in the same order) indicating whether it is valid, the VPC CIDR
+             block containing it, the existing subnets and other proposals it overlaps, and a
+             human-readable error for each problem found.
+    """
+
+    if vpcs is None:
+        boto = _create_boto_wrapper(
+            profile_name=profile_name,
+            region=region,
+            max_concurrency=max_concurrency,
+            max_attempts=max_attempts,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            metrics=metrics
+        )
+        vpcs = validation.iter_proposal_vpcs(boto, proposals)
+    index = validation.TopologyIndex(to_vpc(vpc) for vpc in vpcs)
+    return validation.validate_proposals(proposals, index)
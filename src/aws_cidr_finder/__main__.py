@@ -1,14 +1,57 @@
 import json
 import os
 import sys
-from argparse import ArgumentParser, Namespace
-from typing import Any
+from argparse import ArgumentParser, ArgumentTypeError, Namespace, SUPPRESS
+from typing import Any, Iterable, Iterator, Optional
 
-from tabulate import tabulate
-
-from aws_cidr_finder import core
-from aws_cidr_finder.boto_wrapper import BotoWrapper
+from aws_cidr_finder import core, diff, utilization, validation
+from aws_cidr_finder.boto_wrapper import BotoWrapper, DEFAULT_MAX_CONCURRENCY
+from aws_cidr_finder.cache import DEFAULT_MAX_ENTRIES, ResultCache
 from aws_cidr_finder.core import convert_to_json_format
+from aws_cidr_finder.custom_types import MultiplePrefixJSONOutput, SingleCIDRVPC, VPC
+from aws_cidr_finder.export import write_columnar, write_csv
+from aws_cidr_finder.metrics import Metrics
+from aws_cidr_finder.profiling import profile_iterable, profile_phase, Profiler
+from aws_cidr_finder.report import CapacityReport
+from aws_cidr_finder.table import render_table
+from aws_cidr_finder.topology import load_topology, save_topology
+from aws_cidr_finder.utilization import get_vpc_utilization
+
+
+def _parse_tag(value: str) -> tuple[str, str]:
+    key, separator, tag_value = value.partition("=")
+    if separator == "" or key == "":
+        raise ArgumentTypeError(f"'{value}' is not a tag filter of the form Key=Value")
+    return key, tag_value
+
+
+def _parse_positive_int(value: str) -> int:
+    try:
+        ret = int(value)
+    except ValueError:
+        ret = 0
+    if ret < 1:
+        raise ArgumentTypeError(f"'{value}' is not a positive integer")
+    return ret
+
+
+def _parse_prefixes(value: str) -> list[int]:
+    prefixes: list[int] = []
+    try:
+        for part in value.split(","):
+            first, separator, last = part.partition("-")
+            start = int(first)
+            end = int(last) if separator != "" else start
+            if start > end:
+                raise ValueError
+            prefixes += [prefix for prefix in range(start, end + 1) if prefix not in prefixes]
+    except ValueError:
+        raise ArgumentTypeError((
+            f"'{value}' is not a prefix, a comma-separated list of prefixes, or a range of "
+            "prefixes of the form FIRST-LAST"
+        ))
+    return prefixes
+
 
 _parser: ArgumentParser = ArgumentParser(
     description="A CLI tool for finding unused CIDR blocks in AWS VPCs."
@@ -27,15 +70,75 @@ _parser.add_argument(
     dest="region",
     help="The AWS region to use when interacting with the AWS API."
 )
+_parser.add_argument(
+    "--vpc-id",
+    type=str,
+    action="append",
+    metavar="VPC_ID",
+    dest="vpc_ids",
+    help="Only consider the VPC with this ID. May be specified multiple times."
+)
+_parser.add_argument(
+    "--tag",
+    type=_parse_tag,
+    action="append",
+    metavar="KEY=VALUE",
+    dest="tags",
+    help=(
+        "Only consider VPCs that have a tag with this key and value. May be specified multiple "
+        "times (with different keys), in which case a VPC must match all of the given tags."
+    )
+)
 _parser.add_argument(
     "--prefix",
-    type=int,
+    type=_parse_prefixes,
     metavar="PREFIX",
     dest="prefix",
-    help="The CIDR prefix that you want results to use."
+    help=(
+        "The CIDR prefix that you want results to use. May also be a comma-separated list of "
+        "prefixes and/or ranges of prefixes (e.g. 24,26,28 or 20-28), in which case results are "
+        "grouped per prefix."
+    )
 )
 _parser.add_argument(
-    "--json", action="store_true", dest="json", help="Output results in JSON format."
+    "--top",
+    type=_parse_positive_int,
+    metavar="COUNT",
+    dest="top",
+    help="Only output the COUNT largest available CIDR blocks of each VPC (largest first)."
+)
+_parser.add_argument(
+    "--min-size",
+    type=_parse_positive_int,
+    metavar="IP_COUNT",
+    dest="min_size",
+    help="Only output available CIDR blocks that contain at least IP_COUNT IP addresses."
+)
+_parser.add_argument(
+    "--format",
+    type=str,
+    choices=["table", "json", "csv", "parquet", "arrow"],
+    default="table",
+    dest="format",
+    help=(
+        "The format in which to output results. The csv, parquet, and arrow formats output one "
+        "flat row per available CIDR block, and the parquet and arrow formats require --output as "
+        "well as the 'columnar' extra of this package. Defaults to table."
+    )
+)
+_parser.add_argument(
+    "--json",
+    action="store_true",
+    dest="json",
+    help="Output results in JSON format (equivalent to --format json)."
+)
+_parser.add_argument(
+    "--output",
+    type=str,
+    metavar="FILE",
+    dest="output",
+    help="Write results to FILE instead of STDOUT (only supported by the csv, parquet, and arrow "
+    "formats)."
 )
 _parser.add_argument(
     "--ipv6",
@@ -43,6 +146,208 @@ _parser.add_argument(
     dest="ipv6",
     help="Perform all functions based on IPv6 instead of IPv4."
 )
+_parser.add_argument(
+    "--dual-stack",
+    action="store_true",
+    dest="dual_stack",
+    help=(
+        "Find the available IPv4 and IPv6 CIDR blocks together, parsing both from the same AWS API "
+        "responses. This makes half as many AWS API calls as running once without and once with "
+        "--ipv6. Cannot be used with --ipv6, --prefix, --report, or --utilization."
+    )
+)
+_parser.add_argument(
+    "--report",
+    action="store_true",
+    dest="report",
+    help=(
+        "Instead of listing available CIDR blocks, output the used and free IP counts, the largest "
+        "free CIDR block, the number of free fragments, and a fragmentation index of each VPC, "
+        "rolled up per account/region and across all VPCs. Only the table and json formats are "
+        "supported, and --prefix, --top, and --min-size are ignored."
+    )
+)
+_parser.add_argument(
+    "--utilization",
+    action="store_true",
+    dest="utilization",
+    help=(
+        "Instead of listing available CIDR blocks, output how many usable IPv4 addresses are used "
+        "in each subnet and each VPC (based on data AWS already includes when listing subnets). "
+        "Only the table and json formats are supported, and --ipv6 cannot be used."
+    )
+)
+_parser.add_argument(
+    "--max-concurrency",
+    type=_parse_positive_int,
+    default=DEFAULT_MAX_CONCURRENCY,
+    metavar="COUNT",
+    dest="max_concurrency",
+    help=(
+        "The maximum number of AWS API calls to make concurrently. The size of the connection pool "
+        f"used to talk to the AWS API matches this value. Defaults to {DEFAULT_MAX_CONCURRENCY}."
+    )
+)
+_parser.add_argument(
+    "--max-attempts",
+    type=_parse_positive_int,
+    metavar="COUNT",
+    dest="max_attempts",
+    help=(
+        "The maximum number of attempts (including the initial one) made for each AWS API call "
+        "before giving up. Retries use Boto's adaptive retry mode."
+    )
+)
+_parser.add_argument(
+    "--connect-timeout",
+    type=float,
+    metavar="SECONDS",
+    dest="connect_timeout",
+    help="The number of seconds to wait when establishing a connection to the AWS API."
+)
+_parser.add_argument(
+    "--read-timeout",
+    type=float,
+    metavar="SECONDS",
+    dest="read_timeout",
+    help="The number of seconds to wait when reading a response from the AWS API."
+)
+_parser.add_argument(
+    "--metrics",
+    action="store_true",
+    dest="metrics",
+    help=(
+        "Write a summary of the AWS API calls made (including retries and throttles) to STDERR "
+        "after the results."
+    )
+)
+_parser.add_argument(
+    "--profile-output",
+    type=str,
+    metavar="FILE",
+    dest="profile_output",
+    help=(
+        "Profile the phases of the run which retrieve data from AWS and compute available CIDR "
+        "blocks (using cProfile), and write the profile to FILE in pstats format."
+    )
+)
+_parser.add_argument(
+    "--profile-top",
+    type=_parse_positive_int,
+    metavar="COUNT",
+    dest="profile_top",
+    help=(
+        "Profile the same phases as --profile-output, and write the COUNT functions in which the "
+        "most time was spent to STDERR after the results."
+    )
+)
+_parser.add_argument(
+    "--verify",
+    action="store_true",
+    dest="verify",
+    help=(
+        "Check that the available CIDR blocks of each VPC cover exactly its free address space "
+        "using the fewest possible CIDR blocks, and fail if they do not."
+    )
+)
+_parser.add_argument(
+    "--backend",
+    type=str,
+    choices=core.BACKENDS,
+    default="ranges",
+    dest="backend",
+    help=(
+        "How the free address space of each VPC is computed: as merged IP ranges, or as a bitmap "
+        "at the granularity of the VPC's smallest subnet. Both backends produce the same results."
+    )
+)
+_parser.add_argument(
+    "--cache",
+    type=str,
+    metavar="FILE",
+    dest="cache",
+    help=(
+        "Cache computed results in the SQLite database FILE (which is created if necessary), so "
+        "that only VPCs which are new or have changed since a previous run are computed. Cache "
+        "hits and misses are included in the output of --metrics."
+    )
+)
+_parser.add_argument(
+    "--cache-size",
+    type=_parse_positive_int,
+    default=DEFAULT_MAX_ENTRIES,
+    metavar="COUNT",
+    dest="cache_size",
+    help=(
+        "The maximum number of results to keep in the --cache database, evicting the least "
+        f"recently used results first. Defaults to {DEFAULT_MAX_ENTRIES}."
+    )
+)
+_parser.add_argument(
+    "--save-topology",
+    type=str,
+    metavar="FILE",
+    dest="save_topology",
+    help=(
+        "Also write the VPC and subnet CIDR blocks retrieved from AWS to FILE as a JSON topology "
+        "snapshot, which can later be compared to another snapshot using the diff command."
+    )
+)
+
+_subparsers = _parser.add_subparsers(dest="command", metavar="COMMAND")
+_diff_parser: ArgumentParser = _subparsers.add_parser(
+    "diff",
+    help="Compare the available CIDR blocks of two topology snapshots.",
+    description=(
+        "Output the CIDR blocks that were freed and consumed in each VPC between two topology "
+        "snapshots (see --save-topology) without talking to AWS."
+    )
+)
+_diff_parser.add_argument("old", type=str, metavar="OLD", help="The older topology snapshot.")
+_diff_parser.add_argument("new", type=str, metavar="NEW", help="The newer topology snapshot.")
+# These mirror the top-level arguments of the same name; SUPPRESS prevents their defaults from
+# overwriting values that were given before the command name
+_diff_parser.add_argument(
+    "--ipv6",
+    action="store_true",
+    default=SUPPRESS,
+    dest="ipv6",
+    help="Compare IPv6 CIDR blocks instead of IPv4 CIDR blocks."
+)
+_diff_parser.add_argument(
+    "--json", action="store_true", default=SUPPRESS, dest="json", help="Output in JSON format."
+)
+_check_parser: ArgumentParser = _subparsers.add_parser(
+    "check",
+    help="Check proposed subnet CIDR blocks against the existing VPCs and subnets.",
+    description=(
+        "Check that each proposed subnet CIDR block is inside a CIDR block of its VPC and does not "
+        "overlap any existing subnet or any other proposed CIDR block in the same VPC. The exit "
+        "code is 1 if any proposed CIDR block is invalid."
+    )
+)
+_check_parser.add_argument(
+    "proposals",
+    type=str,
+    metavar="PROPOSALS",
+    help=(
+        "A JSON file containing a list of proposed CIDR blocks, each of the form "
+        '{"vpc_id": "...", "cidr": "..."}.'
+    )
+)
+_check_parser.add_argument(
+    "--topology",
+    type=str,
+    metavar="FILE",
+    dest="topology",
+    help=(
+        "Check against this topology snapshot (see --save-topology) instead of against the VPCs "
+        "in AWS."
+    )
+)
+_check_parser.add_argument(
+    "--json", action="store_true", default=SUPPRESS, dest="json", help="Output in JSON format."
+)
 
 
 def _get_arguments() -> list[str]:  # pragma: no cover
@@ -55,9 +360,250 @@ def _parse_arguments(arguments: list[str]) -> dict[str, Any]:
     return vars(ret)
 
 
+def _output_diagnostics(
+    arguments: dict[str, Any], metrics: Metrics, profiler: Optional[Profiler]
+) -> None:
+    if arguments["metrics"]:
+        print(f"Metrics: {metrics.summary()}", file=sys.stderr)
+    if profiler is not None and arguments.get("profile_output") is not None:
+        profiler.dump(arguments["profile_output"])
+    if profiler is not None and arguments.get("profile_top") is not None:
+        profiler.print_top(arguments["profile_top"])
+
+
+def _print_messages_to_stderr(
+    results: Iterable[tuple[SingleCIDRVPC, list[str], list[str], list[str]]]
+) -> Iterator[tuple[SingleCIDRVPC, list[str]]]:
+    for vpc, cidrs, _, messages in results:
+        for msg in messages:
+            print(msg, file=sys.stderr)
+        yield vpc, cidrs
+
+
+def _select_cidrs(cidrs: list[str], *, top: Optional[int], min_size: Optional[int]) -> list[str]:
+    if top is None and min_size is None:
+        return cidrs
+    return core.select_cidrs(core.sort_cidrs(cidrs), top=top, min_size=min_size)
+
+
+def _write_export(
+    results: Iterable[tuple[SingleCIDRVPC, list[str], list[str], list[str]]],
+    *,
+    output_format: str,
+    output: Optional[str]
+) -> None:
+    # These formats are written incrementally as each VPC is processed, so messages are written to
+    # STDERR as they are encountered rather than being collected up front (only CSV output can be
+    # written to STDOUT, so output is never None for the other formats)
+    if output is None:
+        write_csv(_print_messages_to_stderr(results), sys.stdout)
+    elif output_format == "csv":
+        with open(output, "w", newline="") as f:
+            write_csv(_print_messages_to_stderr(results), f)
+    else:
+        write_columnar(_print_messages_to_stderr(results), output, file_format=output_format)
+
+
+def _collect_results(
+    results: Iterable[tuple[SingleCIDRVPC, list[str], list[str], list[str]]]
+) -> tuple[dict[SingleCIDRVPC, list[str]], list[str], list[str]]:
+    subnet_cidr_gaps: dict[SingleCIDRVPC, list[str]] = {}
+    cidrs_not_converted_to_prefix: list[str] = []
+    messages: list[str] = []
+    for vpc, cidrs, unconverted_cidrs, m in results:
+        subnet_cidr_gaps[vpc] = cidrs
+        cidrs_not_converted_to_prefix += unconverted_cidrs
+        messages += m
+    return subnet_cidr_gaps, cidrs_not_converted_to_prefix, messages
+
+
+def _print_table(
+    vpc: SingleCIDRVPC, cidrs: list[str], *, presorted: bool, prefix: Optional[int] = None
+) -> None:
+    with_prefix = "" if prefix is None else f" with a prefix of {prefix}"
+    print((
+        f"Here are the available CIDR blocks{with_prefix} in the '{vpc.readable_name}' VPC (VPC "
+        f"CIDR block '{vpc.cidr}'):"
+    ))
+    ordered_cidrs = cidrs if presorted else core.sort_cidrs(cidrs)
+    for line in render_table(ordered_cidrs, vpc_cidr=vpc.cidr):
+        print(line)
+
+
+def _output_prefixes(
+    results: Iterable[tuple[int, SingleCIDRVPC, list[str], list[str], list[str]]],
+    prefixes: list[int],
+    *,
+    as_json: bool,
+    presorted: bool
+) -> None:
+    if not as_json:
+        # Like a single prefix, each VPC's tables (one per prefix) are printed as soon as it has
+        # been processed, and messages are written to STDERR as they are encountered
+        for prefix, vpc, cidrs, _, messages in results:
+            for msg in messages:
+                print(msg, file=sys.stderr)
+            _print_table(vpc, cidrs, presorted=presorted, prefix=prefix)
+        return
+
+    grouped_results: dict[int, list[tuple[SingleCIDRVPC, list[str], list[str], list[str]]]] = {
+        prefix: []
+        for prefix in prefixes
+    }
+    for prefix, vpc, cidrs, unconverted_cidrs, messages in results:
+        grouped_results[prefix].append((vpc, cidrs, unconverted_cidrs, messages))
+
+    output: MultiplePrefixJSONOutput = {"prefixes": []}
+    for prefix, prefix_results in grouped_results.items():
+        json_output = convert_to_json_format(*_collect_results(prefix_results))
+        output["prefixes"].append({
+            "prefix": prefix,
+            "messages": json_output["messages"],
+            "cidrs_not_converted_to_prefix": json_output["cidrs_not_converted_to_prefix"],
+            "data": json_output["data"]
+        })
+    print(json.dumps(output))
+
+
+def _output_report(
+    results: Iterable[tuple[SingleCIDRVPC, list[str], list[str], list[str]]], *, as_json: bool
+) -> None:
+    report = CapacityReport()
+    for vpc, cidrs, _, _ in results:
+        stats = report.add_vpc(vpc, cidrs)
+        if not as_json:
+            # Each VPC's capacity is printed as soon as it is known
+            print((
+                f"Capacity of the '{vpc.readable_name}' VPC (VPC CIDR block '{vpc.cidr}'): "
+                f"{stats.summary()}"
+            ))
+
+    if as_json:
+        print(json.dumps(report.to_json()))
+    else:
+        for (account, region), stats in report.accounts.items():
+            print(f"Capacity of account '{account}' in region '{region}': {stats.summary()}")
+        print(f"Capacity of all VPCs: {report.total.summary()}")
+
+
+def _output_utilization(vpcs: Iterable[SingleCIDRVPC], *, as_json: bool) -> None:
+    data: list[utilization.VPCUtilizationData] = []
+    for vpc in vpcs:
+        vpc_stats, subnet_stats = get_vpc_utilization(vpc)
+        if as_json:
+            data.append(utilization.convert_to_json_format(vpc, vpc_stats, subnet_stats))
+        else:
+            print((
+                f"Utilization of the '{vpc.readable_name}' VPC (VPC CIDR block '{vpc.cidr}'): "
+                f"{vpc_stats.summary()}"
+            ))
+            for subnet, stats in subnet_stats:
+                print(f"  {subnet.id} ({subnet.cidr}): {stats.summary()}")
+
+    if as_json:
+        print(json.dumps({"data": data}))
+
+
+def _use_cache(
+    results: Iterable[tuple[SingleCIDRVPC, list[str], list[str], list[str]]], cache: ResultCache
+) -> Iterator[tuple[SingleCIDRVPC, list[str], list[str], list[str]]]:
+    # The cache is closed (and thus persisted) once every result has been consumed
+    with cache:
+        yield from results
+
+
+def _output_diff(old_path: str, new_path: str, *, ipv6: bool, as_json: bool) -> None:
+    changes = diff.diff_vpcs(load_topology(old_path), load_topology(new_path), ipv6=ipv6)
+
+    if as_json:
+        print(json.dumps({"data": [diff.convert_to_json_format(*change) for change in changes]}))
+        return
+
+    found_changes = False
+    for vpc, status, freed_cidrs, consumed_cidrs in changes:
+        found_changes = True
+        print((
+            f"Changes to the available CIDR blocks in the '{vpc.readable_name}' VPC (VPC CIDR "
+            f"block '{vpc.cidr}', {status}):"
+        ))
+        for label, cidrs in [("Freed", freed_cidrs), ("Consumed", consumed_cidrs)]:
+            if len(cidrs) > 0:
+                print(f"{label}:")
+                for line in render_table(cidrs, vpc_cidr=vpc.cidr):
+                    print(line)
+
+    if not found_changes:
+        print(f"No changes to the available {'IPv6' if ipv6 else 'IPv4'} CIDR blocks were found.")
+
+
+def _output_validation(
+    proposals: list[validation.CIDRProposal], vpcs: Iterable[VPC], *, as_json: bool
+) -> bool:
+    results = validation.validate_proposals(proposals, validation.TopologyIndex(vpcs))
+    valid_count = len([result for result in results if result["valid"]])
+
+    if as_json:
+        print(json.dumps({"data": results}))
+    else:
+        for result in results:
+            for error in result["errors"]:
+                print(f"Invalid proposal for VPC '{result['vpc_id']}': {error}")
+        print(f"{valid_count} of {len(results)} proposed CIDR blocks are valid.")
+
+    return valid_count == len(results)
+
+
 def main() -> None:
     arguments = _parse_arguments(_get_arguments())
 
+    if arguments["json"] and arguments["format"] not in ["table", "json"]:
+        _parser.error(f"--json cannot be used with --format {arguments['format']}")
+    output_format: str = "json" if arguments["json"] else arguments["format"]
+    if output_format in ["table", "json"] and arguments.get("output") is not None:
+        _parser.error("--output only supports the csv, parquet, and arrow formats")
+    if arguments["command"] == "diff":
+        # Diffs are computed entirely from snapshots on disk, so no AWS credentials are needed
+        if output_format not in ["table", "json"]:
+            _parser.error("diff only supports the table and json formats")
+        _output_diff(
+            arguments["old"],
+            arguments["new"],
+            ipv6=arguments["ipv6"],
+            as_json=output_format == "json"
+        )
+        return
+    if arguments["command"] == "check" and output_format not in ["table", "json"]:
+        _parser.error("check only supports the table and json formats")
+    if arguments["command"] == "check" and arguments.get("topology") is not None:
+        valid = _output_validation(
+            validation.load_proposals(arguments["proposals"]),
+            load_topology(arguments["topology"]),
+            as_json=output_format == "json"
+        )
+        if not valid:
+            exit(1)
+        return
+
+    if output_format in ["parquet", "arrow"] and arguments.get("output") is None:
+        _parser.error(f"the {output_format} format requires --output")
+    for mode in ["report", "utilization"]:
+        if arguments[mode] and output_format not in ["table", "json"]:
+            _parser.error(f"--{mode} only supports the table and json formats")
+    if arguments["report"] and arguments["utilization"]:
+        _parser.error("--report and --utilization cannot be used together")
+    if arguments["utilization"] and arguments["ipv6"]:
+        _parser.error("--utilization cannot be used with --ipv6")
+    # A single prefix cannot sensibly apply to both IP versions (e.g. an IPv4-sized prefix would
+    # drop every available IPv6 CIDR block)
+    for argument in ["ipv6", "prefix", "report", "utilization"]:
+        if arguments["dual_stack"] and arguments[argument]:
+            _parser.error(f"--dual-stack cannot be used with --{argument}")
+    tag_keys = [key for key, _ in arguments.get("tags") or []]
+    for key in tag_keys:
+        if tag_keys.count(key) > 1:
+            # A VPC must match every tag, and it cannot have more than one value for the same key
+            _parser.error(f"--tag was given multiple times for the key '{key}'")
+
     if arguments.get("profile") is None and (os.environ.get("AWS_ACCESS_KEY_ID") is None
                                              or os.environ.get("AWS_SECRET_ACCESS_KEY")):
         print((
@@ -67,42 +613,134 @@ def main() -> None:
         ))
         exit(1)
 
-    boto = BotoWrapper(profile_name=arguments.get("profile"), region=arguments.get("region"))
+    metrics = Metrics()
+    profiler: Optional[Profiler] = None
+    if arguments.get("profile_output") is not None or arguments.get("profile_top") is not None:
+        profiler = Profiler()
+    with profile_phase(profiler):
+        boto = BotoWrapper(
+            profile_name=arguments.get("profile"),
+            region=arguments.get("region"),
+            max_concurrency=arguments["max_concurrency"],
+            max_attempts=arguments.get("max_attempts"),
+            connect_timeout=arguments.get("connect_timeout"),
+            read_timeout=arguments.get("read_timeout"),
+            metrics=metrics
+        )
+
+    if arguments["command"] == "check":
+        proposals = validation.load_proposals(arguments["proposals"])
+        valid = _output_validation(
+            proposals,
+            profile_iterable(validation.iter_proposal_vpcs(boto, proposals), profiler),
+            as_json=output_format == "json"
+        )
+        _output_diagnostics(arguments, metrics, profiler)
+        if not valid:
+            exit(1)
+        return
 
     ipv6: bool = arguments["ipv6"]
+    dual_stack: bool = arguments["dual_stack"]
 
-    subnet_cidr_gaps, cidrs_not_converted_to_prefix, messages = boto.get_subnet_cidr_gaps(
-        ipv6=ipv6, prefix=arguments.get("prefix")
+    tags: Optional[list[tuple[str, str]]] = arguments.get("tags")
+
+    vpcs = profile_iterable(
+        boto.iter_vpc_data(
+            ipv6=ipv6,
+            vpc_ids=arguments.get("vpc_ids"),
+            tags=None if tags is None else dict(tags),
+            include_subnet_usage=arguments["utilization"],
+            dual_stack=dual_stack
+        ),
+        profiler
     )
+    if arguments.get("save_topology") is not None:
+        vpcs = save_topology(vpcs, arguments["save_topology"])
 
-    if arguments["json"]:
-        print(
-            json.dumps(
-                convert_to_json_format(subnet_cidr_gaps, cidrs_not_converted_to_prefix, messages)
-            )
+    if arguments["utilization"]:
+        single_cidr_vpcs = (
+            single_cidr_vpc for vpc in vpcs
+            for single_cidr_vpc in core.split_out_individual_cidrs([vpc])
         )
-    else:
-        if len(subnet_cidr_gaps) == 0:
-            print(f"No available {'IPv6' if ipv6 else 'IPv4'} CIDR blocks were found in any VPC.")
+        _output_utilization(single_cidr_vpcs, as_json=output_format == "json")
+        _output_diagnostics(arguments, metrics, profiler)
+        return
+
+    cache: Optional[ResultCache] = None
+    if arguments.get("cache") is not None:
+        cache = ResultCache(
+            path=arguments["cache"], max_entries=arguments["cache_size"], metrics=metrics
+        )
+
+    prefixes: list[int] = arguments.get("prefix") or []
+    results = profile_iterable(
+        core.iter_subnet_cidr_gaps(
+            vpcs,
+            # Capacity reports are based on the available CIDR blocks in their simplest form, as are
+            # multiple prefixes (each of which is derived from the same available CIDR blocks below)
+            prefix=prefixes[0] if len(prefixes) == 1 and not arguments["report"] else None,
+            verify=arguments["verify"],
+            cache=cache,
+            backend=arguments["backend"]
+        ),
+        profiler
+    )
+    if cache is not None:
+        results = _use_cache(results, cache)
+
+    if arguments["report"]:
+        _output_report(results, as_json=output_format == "json")
+        _output_diagnostics(arguments, metrics, profiler)
+        return
+
+    top: Optional[int] = arguments.get("top")
+    min_size: Optional[int] = arguments.get("min_size")
+
+    if len(prefixes) > 1:
+        breakdowns = profile_iterable(core.iter_prefix_breakdowns(results, prefixes), profiler)
+        prefix_results = ((prefix, vpc, _select_cidrs(cidrs, top=top, min_size=min_size), u, m)
+                          for prefix, vpc, cidrs, u, m in breakdowns)
+        if output_format in ["csv", "parquet", "arrow"]:
+            # The prefix column of each row already identifies which prefix it belongs to
+            _write_export(((vpc, cidrs, u, m) for _, vpc, cidrs, u, m in prefix_results),
+                          output_format=output_format,
+                          output=arguments.get("output"))
         else:
-            for msg in messages:
-                print(msg)
-            if len(messages) > 0:
-                print()
-
-            for vpc, subnet_cidrs in subnet_cidr_gaps.items():
-                sorted_cidrs = core.sort_cidrs(subnet_cidrs)
-                print((
-                    f"Here are the available CIDR blocks in the '{vpc.readable_name}' VPC (VPC "
-                    f"CIDR block '{vpc.cidr}'):"
-                ))
-                table_data = []
-                for cidr in sorted_cidrs:
-                    table_data.append([cidr, core.get_ip_count(cidr)])
-                table_data.append([
-                    "Total", sum([core.get_ip_count(cidr) for cidr in sorted_cidrs])
-                ])
-                print(tabulate(table_data, headers=["CIDR", "IP Count"]))
+            _output_prefixes(
+                prefix_results,
+                prefixes,
+                as_json=output_format == "json",
+                presorted=top is not None
+            )
+        _output_diagnostics(arguments, metrics, profiler)
+        return
+
+    results = ((vpc, _select_cidrs(cidrs, top=top, min_size=min_size), u, m)
+               for vpc, cidrs, u, m in results)
+
+    if output_format in ["csv", "parquet", "arrow"]:
+        _write_export(results, output_format=output_format, output=arguments.get("output"))
+        _output_diagnostics(arguments, metrics, profiler)
+        return
+
+    if output_format == "json":
+        print(json.dumps(convert_to_json_format(*_collect_results(results))))
+        _output_diagnostics(arguments, metrics, profiler)
+        return
+
+    # Each VPC's table is printed as soon as it has been processed, so messages are written to
+    # STDERR as they are encountered (just like the other streaming formats)
+    found_vpcs = False
+    for vpc, cidrs in _print_messages_to_stderr(results):
+        found_vpcs = True
+        # When --top is used, the CIDR blocks are already ordered from largest to smallest
+        _print_table(vpc, cidrs, presorted=top is not None)
+    if not found_vpcs:
+        ip_version = "IPv4 or IPv6" if dual_stack else "IPv6" if ipv6 else "IPv4"
+        print(f"No available {ip_version} CIDR blocks were found in any VPC.")
+
+    _output_diagnostics(arguments, metrics, profiler)
 
 
 if __name__ == "__main__":
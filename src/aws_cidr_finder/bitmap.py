@@ -0,0 +1,180 @@
+from ipaddress import ip_network, IPv4Network, IPv6Network
+from typing import Iterable, Iterator, Optional, Union
+
+from aws_cidr_finder.networks import get_ip_range, get_ip_version, get_prefix
+
+# Bitmaps larger than this (i.e. VPC CIDR blocks whose finest subnet granularity is more than 2^24
+# times smaller than the VPC CIDR block itself) are too sparse to be worth representing as bitmaps
+MAX_BITMAP_SIZE: int = 2**24
+
+
+class OccupancyBitmap:
+    """
+    This class represents the occupancy of a VPC CIDR block as a bitmap stored in a single integer,
+    where each bit corresponds to one block of the given granularity (i.e. prefix) and is set when
+    that block is occupied by a subnet. Because subnets and free blocks are always aligned to their
+    own prefix, every query and update is a handful of whole-integer bit operations rather than a
+    walk over the subnets, which suits dense VPC CIDR blocks with many small subnets.
+    """
+    __slots__ = (
+        "vpc_cidr", "granularity", "size", "_network", "_first_ip", "_last_ip", "_occupied"
+    )
+
+    def __init__(self, *, vpc_cidr: str, granularity: int):
+        """
+        :param vpc_cidr: The VPC CIDR block whose occupancy is represented.
+        :param granularity: The prefix of the smallest blocks that the bitmap tracks, which must be
+                            at least the prefix of every subnet that will be added to the bitmap.
+        """
+        network = ip_network(vpc_cidr)
+        if not network.prefixlen <= granularity <= network.max_prefixlen:
+            raise ValueError(
+                f"The granularity {granularity} is not a valid prefix within the CIDR '{vpc_cidr}'"
+            )
+        self.vpc_cidr = vpc_cidr
+        self.granularity = granularity
+        self.size = 1 << (granularity - network.prefixlen)
+        self._network: Union[IPv4Network, IPv6Network] = network
+        self._first_ip, self._last_ip = get_ip_range(vpc_cidr)
+        self._occupied = 0
+
+    def _get_bit_offset(self, address: int) -> int:
+        return (address - self._first_ip) >> (self._network.max_prefixlen - self.granularity)
+
+    def _get_bits(self, cidr: str) -> tuple[int, int]:
+        # Returns the offset and number of the bits covered by the CIDR. The networks functions are
+        # used here (rather than parsing the CIDR directly) because they cache parsed networks.
+        first_ip, last_ip = get_ip_range(cidr)
+        if get_ip_version(cidr) != self._network.version or \
+                first_ip < self._first_ip or last_ip > self._last_ip:
+            raise ValueError(f"The CIDR '{cidr}' is not inside the CIDR '{self.vpc_cidr}'")
+        prefix = get_prefix(cidr)
+        if prefix > self.granularity:
+            raise ValueError((
+                f"The CIDR '{cidr}' is smaller than the granularity ({self.granularity}) of the "
+                f"bitmap for the CIDR '{self.vpc_cidr}'"
+            ))
+        return self._get_bit_offset(first_ip), 1 << (self.granularity - prefix)
+
+    def _get_mask(self, cidr: str) -> int:
+        offset, bit_count = self._get_bits(cidr)
+        return ((1 << bit_count) - 1) << offset
+
+    def _get_cidr(self, index: int, prefix: int) -> str:
+        address = self._first_ip + (index << (self._network.max_prefixlen - prefix))
+        return str(type(self._network)((address, prefix)))
+
+    def _get_free_block_mask(self, prefix: int) -> int:
+        # Returns a mask whose bit i * k is set when the k bits starting there are all free, where k
+        # is the number of bits in a block with the given prefix (which must not be finer than the
+        # granularity). The free bits are folded onto the first bit of each block by repeatedly
+        # AND-ing them with a shifted copy of themselves, doubling the shift every time.
+        free = ~self._occupied & ((1 << self.size) - 1)
+        bit_count = 1 << (self.granularity - prefix)
+        shift = 1
+        while shift < bit_count:
+            free &= free >> shift
+            shift <<= 1
+        # This has a 1 at the first bit of each aligned block (a repunit in base 2^bit_count)
+        block_starts = ((1 << self.size) - 1) // ((1 << bit_count) - 1)
+        return free & block_starts
+
+    def add_subnet(self, cidr: str) -> None:
+        self._occupied |= self._get_mask(cidr)
+
+    def add_subnets(self, cidrs: Iterable[str]) -> None:
+        # Adding each subnet individually creates a new integer as large as the bitmap for every
+        # subnet, so the subnets are marked in a string of binary digits that is converted once
+        digits = bytearray(b"0" * self.size)
+        for cidr in cidrs:
+            offset, bit_count = self._get_bits(cidr)
+            digits[offset:offset + bit_count] = b"1" * bit_count
+        # The first bit is the least significant one, i.e. the last binary digit
+        digits.reverse()
+        self._occupied |= int(digits, 2)
+
+    def remove_subnet(self, cidr: str) -> None:
+        self._occupied &= ~self._get_mask(cidr)
+
+    def is_free(self, cidr: str) -> bool:
+        return self._occupied & self._get_mask(cidr) == 0
+
+    def iter_free_blocks(self, prefix: int) -> Iterator[str]:
+        """
+        Lazily yields every free CIDR block with the given prefix (in order). Free blocks that are
+        finer than the granularity of the bitmap are derived from the free blocks of the bitmap's
+        granularity.
+        """
+        if prefix < self._network.prefixlen or prefix > self._network.max_prefixlen:
+            return
+        mask = self._get_free_block_mask(min(prefix, self.granularity))
+        bit_count = 1 << (self.granularity - min(prefix, self.granularity))
+        while mask != 0:
+            index = (mask & -mask).bit_length() - 1
+            mask &= mask - 1
+            cidr = self._get_cidr(index // bit_count, min(prefix, self.granularity))
+            if prefix <= self.granularity:
+                yield cidr
+            else:
+                yield from (str(sub) for sub in ip_network(cidr).subnets(new_prefix=prefix))
+
+    def count_free_blocks(self, prefix: int) -> int:
+        if prefix < self._network.prefixlen or prefix > self._network.max_prefixlen:
+            return 0
+        count = bin(self._get_free_block_mask(min(prefix, self.granularity))).count("1")
+        return count << max(prefix - self.granularity, 0)
+
+    def allocate(self, prefix: int) -> Optional[str]:
+        """
+        Marks the first free CIDR block with the given prefix as occupied and returns it, or returns
+        None if there is no free CIDR block with the given prefix. The prefix must not be finer than
+        the granularity of the bitmap.
+        """
+        if prefix > self.granularity:
+            raise ValueError((
+                f"Cannot allocate a CIDR block with a prefix of {prefix} from the bitmap for the "
+                f"CIDR '{self.vpc_cidr}' because its granularity is only {self.granularity}"
+            ))
+        if prefix < self._network.prefixlen:
+            return None
+        mask = self._get_free_block_mask(prefix)
+        if mask == 0:
+            return None
+        index = (mask & -mask).bit_length() - 1
+        cidr = self._get_cidr(index >> (self.granularity - prefix), prefix)
+        self.add_subnet(cidr)
+        return cidr
+
+    def get_free_ip_ranges(self) -> list[tuple[int, int]]:
+        """
+        Returns the free address space of the VPC CIDR block as sorted, maximal, inclusive ranges of
+        integer IP addresses (i.e. in the same form as get_free_ip_ranges).
+        """
+        ret: list[tuple[int, int]] = []
+        ips_per_bit = 1 << (self._network.max_prefixlen - self.granularity)
+        free = ~self._occupied & ((1 << self.size) - 1)
+        while free != 0:
+            start = (free & -free).bit_length() - 1
+            shifted = free >> start
+            # The length of the run of free bits is the number of trailing ones in shifted
+            length = (shifted ^ (shifted + 1)).bit_length() - 1
+            free &= ~(((1 << length) - 1) << start)
+            ret.append((
+                self._first_ip + start * ips_per_bit,
+                self._first_ip + (start + length) * ips_per_bit - 1
+            ))
+        return ret
+
+
+def build_bitmap(vpc_cidr: str, subnet_cidrs: list[str]) -> Optional[OccupancyBitmap]:
+    """
+    Builds an OccupancyBitmap of the VPC CIDR block whose granularity is the prefix of its smallest
+    subnet, or returns None if that bitmap would have more than MAX_BITMAP_SIZE bits.
+    """
+    vpc_prefix = get_prefix(vpc_cidr)
+    granularity = max((get_prefix(cidr) for cidr in subnet_cidrs), default=vpc_prefix)
+    if 1 << (granularity - vpc_prefix) > MAX_BITMAP_SIZE:
+        return None
+    bitmap = OccupancyBitmap(vpc_cidr=vpc_cidr, granularity=granularity)
+    bitmap.add_subnets(subnet_cidrs)
+    return bitmap
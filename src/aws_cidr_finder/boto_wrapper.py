@@ -1,12 +1,34 @@
 import os
-from typing import Optional
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterable, Iterator, Optional
 
 import boto3
+from botocore.client import BaseClient
+from botocore.config import Config
 from mypy_boto3_ec2 import EC2Client
-from mypy_boto3_ec2.type_defs import VpcTypeDef, DescribeSubnetsResultTypeDef, SubnetTypeDef
+from mypy_boto3_ec2.type_defs import VpcTypeDef, DescribeSubnetsResultTypeDef, SubnetTypeDef, \
+    FilterTypeDef
 
 from aws_cidr_finder import core
-from aws_cidr_finder.custom_types import VPC, SingleCIDRVPC
+from aws_cidr_finder.cache import ResultCache
+from aws_cidr_finder.custom_types import VPC, SingleCIDRVPC, SubnetUsage
+from aws_cidr_finder.metrics import Metrics
+
+DEFAULT_MAX_CONCURRENCY: int = 10
+
+# These are the error codes that the EC2 API (and AWS APIs in general) use to signal throttling; see
+# https://docs.aws.amazon.com/AWSEC2/latest/APIReference/throttling.html
+_THROTTLING_ERROR_CODES: frozenset[str] = frozenset({
+    "RequestLimitExceeded",
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestThrottled",
+    "RequestThrottledException",
+    "TooManyRequestsException",
+    "BandwidthLimitExceeded"
+})
 
 
 def _get_vpc_name(vpc: VpcTypeDef) -> Optional[str]:
@@ -22,7 +44,8 @@ def _parse_vpc_cidrs(vpc: VpcTypeDef, *, ipv6: bool) -> list[str]:
     if ipv6:
         return [
             association["Ipv6CidrBlock"]
-            for association in vpc["Ipv6CidrBlockAssociationSet"]
+            # VPCs without any IPv6 CIDR blocks may omit this key entirely
+            for association in vpc.get("Ipv6CidrBlockAssociationSet", [])
             if association["Ipv6CidrBlockState"]["State"] in ["associated", "associating"]
         ]
     else:
@@ -40,15 +63,110 @@ def _parse_subnet_cidrs(subnets: list[SubnetTypeDef], *, ipv6: bool) -> list[str
         return [
             association["Ipv6CidrBlock"]
             for subnet in subnets
-            for association in subnet["Ipv6CidrBlockAssociationSet"]
+            for association in subnet.get("Ipv6CidrBlockAssociationSet", [])
             if association["Ipv6CidrBlockState"]["State"] in ["associated", "associating"]
         ]
     else:
         return [subnet["CidrBlock"] for subnet in subnets if "CidrBlock" in subnet]
 
 
+def _parse_subnet_usage(subnets: list[SubnetTypeDef]) -> list[SubnetUsage]:
+    # Note: AvailableIpAddressCount is part of the same describe_subnets response as the CIDR blocks
+    # of the subnets, so no additional API calls are needed to determine how utilized each subnet is
+    return [
+        SubnetUsage(
+            id=subnet["SubnetId"],
+            cidr=subnet["CidrBlock"],
+            available_ip_count=subnet["AvailableIpAddressCount"]
+        ) for subnet in subnets if "CidrBlock" in subnet and "AvailableIpAddressCount" in subnet
+    ]
+
+
+def _build_vpc_filters(*, vpc_ids: Optional[list[str]],
+                       tags: Optional[dict[str, str]]) -> list[FilterTypeDef]:
+    # Note: the filter names used below are documented here:
+    # https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_vpcs
+    filters: list[FilterTypeDef] = []
+    if vpc_ids is not None and len(vpc_ids) > 0:
+        filters.append({"Name": "vpc-id", "Values": vpc_ids})
+    for key, value in (tags or {}).items():
+        filters.append({"Name": f"tag:{key}", "Values": [value]})
+    return filters
+
+
+def _build_client_config(
+    *,
+    max_concurrency: int,
+    max_attempts: Optional[int],
+    connect_timeout: Optional[float],
+    read_timeout: Optional[float]
+) -> Config:
+    # Adaptive retries add client-side rate limiting on top of the standard retry behavior, which
+    # helps avoid RequestLimitExceeded errors when many calls are made in a short period of time.
+    # The connection pool is sized to match the number of concurrent requests so that connections
+    # are reused rather than discarded and re-established.
+    config = Config(retries={"mode": "adaptive"}, max_pool_connections=max_concurrency)
+
+    # Only explicitly-requested settings are merged in so that Boto's defaults apply otherwise
+    if max_attempts is not None:
+        config = config.merge(
+            Config(retries={
+                "mode": "adaptive", "total_max_attempts": max_attempts
+            })
+        )
+    if connect_timeout is not None:
+        config = config.merge(Config(connect_timeout=connect_timeout))
+    if read_timeout is not None:
+        config = config.merge(Config(read_timeout=read_timeout))
+
+    return config
+
+
+def _record_throttle(metrics: Metrics, response: Any = None, **kwargs: Any) -> None:
+    # This is invoked by Boto after every attempt of an API call, before Boto decides whether to
+    # retry; see https://boto3.amazonaws.com/v1/documentation/api/latest/guide/events.html
+    if response is not None and response[1].get("Error", {}).get("Code") in _THROTTLING_ERROR_CODES:
+        metrics.record_throttle()
+
+
+def _record_api_call(metrics: Metrics, parsed: Any = None, **kwargs: Any) -> None:
+    # This is invoked by Boto once per API call (as opposed to once per attempt)
+    retries = 0 if parsed is None else parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+    metrics.record_api_call(retries=retries)
+
+
+def _record_failed_api_call(metrics: Metrics, exception: Any = None, **kwargs: Any) -> None:
+    response = getattr(exception, "response", None)
+    _record_api_call(metrics, parsed=response)
+
+
+def _register_metrics_handlers(client: BaseClient, metrics: Metrics) -> None:
+    events = client.meta.events
+    # Boto notifies every "needs-retry" handler after each attempt and acts on the first non-None
+    # response (i.e. the delay returned by its own retry handler). The throttle handler always
+    # returns None, so it observes every attempt without affecting whether or when Boto retries.
+    events.register_first("needs-retry.ec2", lambda **kwargs: _record_throttle(metrics, **kwargs))
+    events.register("after-call.ec2", lambda **kwargs: _record_api_call(metrics, **kwargs))
+    events.register(
+        "after-call-error.ec2", lambda **kwargs: _record_failed_api_call(metrics, **kwargs)
+    )
+
+
 class BotoWrapper:
-    def __init__(self, *, profile_name: Optional[str], region: Optional[str]):  # pragma: no cover
+    def __init__(
+        self,
+        *,
+        profile_name: Optional[str],
+        region: Optional[str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_attempts: Optional[int] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        metrics: Optional[Metrics] = None
+    ):  # pragma: no cover
+        if max_concurrency < 1:
+            # Otherwise, this would only fail once VPCs are being retrieved (i.e. mid-output)
+            raise ValueError(f"max_concurrency must be a positive integer, not {max_concurrency}")
         if profile_name is not None:
             boto = boto3.session.Session(profile_name=profile_name, region_name=region)
         else:
@@ -58,44 +176,135 @@ class BotoWrapper:
                 aws_session_token=os.environ.get("AWS_SESSION_TOKEN"),
                 region_name=region
             )
-        self._client: EC2Client = boto.client("ec2")
+        self._max_concurrency = max_concurrency
+        self._client: EC2Client = boto.client(
+            "ec2",
+            config=_build_client_config(
+                max_concurrency=max_concurrency,
+                max_attempts=max_attempts,
+                connect_timeout=connect_timeout,
+                read_timeout=read_timeout
+            )
+        )
+        if metrics is not None:
+            _register_metrics_handlers(self._client, metrics)
 
-    def _get_vpc_data(self, *, ipv6: bool) -> list[VPC]:  # pragma: no cover
-        vpcs = self._client.describe_vpcs()["Vpcs"]
-        return [
-            VPC(
-                id=vpc["VpcId"],
-                name=_get_vpc_name(vpc),
-                cidrs=_parse_vpc_cidrs(vpc, ipv6=ipv6),
-                subnets=_parse_subnet_cidrs(
-                    self._get_subnet_cidrs(vpc["VpcId"])["Subnets"], ipv6=ipv6
+    def _get_vpc_data(
+        self,
+        *,
+        ipv6: bool,
+        vpc_ids: Optional[list[str]] = None,
+        tags: Optional[dict[str, str]] = None,
+        include_subnet_usage: bool = False,
+        dual_stack: bool = False
+    ) -> Iterable[VPC]:
+        # Filtering happens on the AWS side so that VPCs the caller does not care about are never
+        # transferred, parsed, or processed
+        filters = _build_vpc_filters(vpc_ids=vpc_ids, tags=tags)
+        # In dual-stack mode, the CIDR blocks of both IP versions are parsed from the same responses
+        ip_versions = [False, True] if dual_stack else [ipv6]
+        vpcs = iter(self._client.describe_vpcs(Filters=filters)["Vpcs"])
+        region = self._client.meta.region_name
+        executor = ThreadPoolExecutor(max_workers=self._max_concurrency)
+        pending: deque[tuple[VpcTypeDef, Future[DescribeSubnetsResultTypeDef]]] = deque()
+
+        def submit_next() -> None:
+            vpc = next(vpcs, None)
+            if vpc is not None:
+                pending.append((vpc, executor.submit(self._get_subnet_cidrs, vpc["VpcId"])))
+
+        try:
+            for _ in range(self._max_concurrency):
+                submit_next()
+            # VPCs are yielded one at a time (in order) as soon as their subnets have been
+            # retrieved. Only max_concurrency calls are in flight at any time (the next one being
+            # submitted as each VPC is yielded), so the responses held in memory do not grow with
+            # the number of VPCs, and consumers which stop early do not cause the remaining VPCs to
+            # be retrieved.
+            while len(pending) > 0:
+                vpc, future = pending.popleft()
+                subnet_response = future.result()
+                submit_next()
+                yield VPC(
+                    id=vpc["VpcId"],
+                    name=_get_vpc_name(vpc),
+                    cidrs=[
+                        cidr for version in ip_versions
+                        for cidr in _parse_vpc_cidrs(vpc, ipv6=version)
+                    ],
+                    subnets=[
+                        cidr for version in ip_versions
+                        for cidr in _parse_subnet_cidrs(subnet_response["Subnets"], ipv6=version)
+                    ],
+                    account=vpc.get("OwnerId"),
+                    region=region,
+                    subnet_usage=_parse_subnet_usage(subnet_response["Subnets"])
+                    if include_subnet_usage else None
                 )
-            ) for vpc in vpcs
-        ]
+        finally:
+            # Calls which have not started yet (e.g. because the consumer stopped early) are dropped
+            executor.shutdown(cancel_futures=True)
 
-    def _get_subnet_cidrs(self, vpc_id: str) -> DescribeSubnetsResultTypeDef:  # pragma: no cover
+    def _get_subnet_cidrs(self, vpc_id: str) -> DescribeSubnetsResultTypeDef:
         return self._client.describe_subnets(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])
 
+    def iter_vpc_data(
+        self,
+        *,
+        ipv6: bool,
+        vpc_ids: Optional[list[str]] = None,
+        tags: Optional[dict[str, str]] = None,
+        include_subnet_usage: bool = False,
+        dual_stack: bool = False
+    ) -> Iterator[VPC]:
+        yield from self._get_vpc_data(
+            ipv6=ipv6,
+            vpc_ids=vpc_ids,
+            tags=tags,
+            include_subnet_usage=include_subnet_usage,
+            dual_stack=dual_stack
+        )
+
+    def iter_subnet_cidr_gaps(
+        self,
+        *,
+        ipv6: bool,
+        prefix: Optional[int],
+        vpc_ids: Optional[list[str]] = None,
+        tags: Optional[dict[str, str]] = None,
+        cache: Optional[ResultCache] = None,
+        dual_stack: bool = False,
+        backend: str = "ranges"
+    ) -> Iterator[tuple[SingleCIDRVPC, list[str], list[str], list[str]]]:
+        vpcs = self._get_vpc_data(ipv6=ipv6, vpc_ids=vpc_ids, tags=tags, dual_stack=dual_stack)
+        return core.iter_subnet_cidr_gaps(vpcs, prefix=prefix, cache=cache, backend=backend)
+
     def get_subnet_cidr_gaps(
-        self, *, ipv6: bool, prefix: Optional[int]
+        self,
+        *,
+        ipv6: bool,
+        prefix: Optional[int],
+        vpc_ids: Optional[list[str]] = None,
+        tags: Optional[dict[str, str]] = None,
+        cache: Optional[ResultCache] = None,
+        dual_stack: bool = False,
+        backend: str = "ranges"
     ) -> tuple[dict[SingleCIDRVPC, list[str]], list[str], list[str]]:
         subnet_cidr_gaps: dict[SingleCIDRVPC, list[str]] = {}
         cidrs_not_converted_to_prefix: list[str] = []
         messages: list[str] = []
 
-        for vpc in core.split_out_individual_cidrs(self._get_vpc_data(ipv6=ipv6)):
-            # yapf: disable
-            subnet_cidr_gaps[vpc] = core.find_subnet_holes(
-                vpc.cidr,
-                vpc.subnets
-            )
-            # yapf: enable
-            if prefix is not None:
-                converted_cidrs, unconverted_cidrs, m = core.break_down_to_desired_prefix(
-                    vpc.readable_name, subnet_cidr_gaps[vpc], prefix
-                )
-                subnet_cidr_gaps[vpc] = converted_cidrs
-                cidrs_not_converted_to_prefix += unconverted_cidrs
-                messages += m
+        for vpc, cidrs, unconverted_cidrs, m in self.iter_subnet_cidr_gaps(
+            ipv6=ipv6,
+            prefix=prefix,
+            vpc_ids=vpc_ids,
+            tags=tags,
+            cache=cache,
+            dual_stack=dual_stack,
+            backend=backend
+        ):
+            subnet_cidr_gaps[vpc] = cidrs
+            cidrs_not_converted_to_prefix += unconverted_cidrs
+            messages += m
 
         return subnet_cidr_gaps, cidrs_not_converted_to_prefix, messages
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+from types import TracebackType
+from typing import Optional
+
+from aws_cidr_finder.metrics import Metrics
+
+DEFAULT_MAX_ENTRIES: int = 10000
+DEFAULT_MAX_MEMORY_ENTRIES: int = 1024
+# The number of writes to the database after which they are committed and the database is trimmed
+# to its maximum number of results (so that a long run neither loses nor accumulates much)
+COMMIT_INTERVAL: int = 100
+
+# The available CIDR blocks of a VPC CIDR block and the CIDR blocks not converted to the prefix
+CachedResult = tuple[list[str], list[str]]
+
+
+def get_cache_key(
+    vpc_cidr: str, subnet_cidrs: list[str], *, ipv6: bool, prefix: Optional[int]
+) -> str:
+    # Results only depend on these inputs, so VPCs that have not changed (or different VPCs with the
+    # same layout) share a key. Subnets are sorted because the order AWS returns them in may vary.
+    data = json.dumps([vpc_cidr, sorted(subnet_cidrs), ipv6, prefix])
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    This class caches computed available CIDR blocks, keyed by get_cache_key. Recently used results
+    are kept in memory, and results are optionally persisted to a SQLite database so that later runs
+    can reuse them. Both are bounded in size, evicting the least recently used results first.
+    Writes to the database are committed every COMMIT_INTERVAL writes, so instances with a path
+    must be closed (or used in a with block) to commit the remaining writes.
+    """
+    def __init__(
+        self,
+        *,
+        path: Optional[str] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_memory_entries: int = DEFAULT_MAX_MEMORY_ENTRIES,
+        metrics: Optional[Metrics] = None
+    ):
+        """
+        :param path: The path of the SQLite database in which to persist results. If omitted,
+                     results are only cached in memory.
+        :param max_entries: The maximum number of results to keep in the database.
+        :param max_memory_entries: The maximum number of results to keep in memory.
+        :param metrics: If given, this object will be updated with the number of cache hits and
+                        misses.
+        """
+        sizes = {"max_entries": max_entries, "max_memory_entries": max_memory_entries}
+        for name, value in sizes.items():
+            if value < 1:
+                # SQLite would otherwise delete every result (0) or treat the limit as absent (< 0)
+                raise ValueError(f"{name} must be a positive integer, not {value}")
+        self._max_entries = max_entries
+        self._max_memory_entries = max_memory_entries
+        self._metrics = metrics
+        self._memory: OrderedDict[str, CachedResult] = OrderedDict()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._last_used = 0
+        self._pending_writes = 0
+        if path is not None:
+            self._connection = sqlite3.connect(path)
+            self._connection.execute((
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used INTEGER NOT NULL)"
+            ))
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)"
+            )
+            row = self._connection.execute("SELECT MAX(last_used) FROM results").fetchone()
+            self._last_used = row[0] or 0
+
+    def _remember(self, key: str, result: CachedResult) -> None:
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _touch(self) -> int:
+        # The database's notion of recency is a counter that increases with every use
+        self._last_used += 1
+        return self._last_used
+
+    def _record_write(self) -> None:
+        self._pending_writes += 1
+        if self._pending_writes >= COMMIT_INTERVAL:
+            self._commit()
+
+    def _commit(self) -> None:
+        if self._connection is None:
+            return
+        self._connection.execute(
+            "DELETE FROM results WHERE key NOT IN "
+            "(SELECT key FROM results ORDER BY last_used DESC LIMIT ?)", (self._max_entries, )
+        )
+        self._connection.commit()
+        self._pending_writes = 0
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        result = self._memory.get(key)
+        if result is None and self._connection is not None:
+            cursor = self._connection.execute("SELECT value FROM results WHERE key = ?", (key, ))
+            row = cursor.fetchone()
+            if row is not None:
+                value = json.loads(row[0])
+                result = value["available_cidr_blocks"], value["cidrs_not_converted_to_prefix"]
+        if result is not None and self._connection is not None:
+            self._connection.execute(
+                "UPDATE results SET last_used = ? WHERE key = ?", (self._touch(), key)
+            )
+            self._record_write()
+
+        if self._metrics is not None:
+            if result is None:
+                self._metrics.record_cache_miss()
+            else:
+                self._metrics.record_cache_hit()
+        if result is None:
+            return None
+        self._remember(key, result)
+        # Copies are returned so that callers cannot modify the cached result
+        return list(result[0]), list(result[1])
+
+    def put(self, key: str, result: CachedResult) -> None:
+        self._remember(key, (list(result[0]), list(result[1])))
+        if self._connection is not None:
+            value = json.dumps({
+                "available_cidr_blocks": result[0], "cidrs_not_converted_to_prefix": result[1]
+            })
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results (key, value, last_used) VALUES (?, ?, ?)",
+                (key, value, self._touch())
+            )
+            self._record_write()
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._commit()
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType]
+    ) -> None:
+        self.close()
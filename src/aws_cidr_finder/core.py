@@ -1,9 +1,16 @@
-from functools import cmp_to_key
-from ipaddress import AddressValueError, ip_address, ip_network, IPv4Network, IPv6Network, \
-    IPv4Address, IPv6Address
-from typing import Optional, Union
+from ipaddress import IPv4Network, IPv6Network, IPv4Address, IPv6Address, summarize_address_range
+from typing import Iterable, Iterator, Optional, Union
 
+from aws_cidr_finder.bitmap import build_bitmap
+from aws_cidr_finder.cache import get_cache_key, ResultCache
 from aws_cidr_finder.custom_types import VPC, SingleCIDRVPC, JSONOutput, VPCCIDRData
+from aws_cidr_finder.networks import get_ip_range, get_ip_version, get_network, get_prefix, \
+    IPRange
+
+# The ways in which the free address space of a VPC CIDR block can be computed: "ranges" merges the
+# subnets as integer IP ranges, while "bitmap" marks them in an OccupancyBitmap (see bitmap.py) at
+# the granularity of the smallest subnet
+BACKENDS: list[str] = ["ranges", "bitmap"]
 
 
 def _get_cidr(network: Union[IPv4Network, IPv6Network]) -> str:
@@ -11,136 +18,208 @@ def _get_cidr(network: Union[IPv4Network, IPv6Network]) -> str:
 
 
 def _cidrs_are_adjacent(cidr1: str, cidr2: str) -> bool:
-    a = ip_network(cidr1)
-    b = ip_network(cidr2)
+    a = get_network(cidr1)
+    b = get_network(cidr2)
     return (int(a[-1]) + 1 == int(b[0])) or (int(b[-1]) + 1 == int(a[0]))
 
 
-def _get_first_ip_in_next_cidr(cidr: str) -> str:
-    # Python needs a little "help" inferring which type of IP address an integer value represents,
-    # thus we have the manual check below
-    network = ip_network(cidr)
-    if isinstance(network, IPv4Network):
-        return IPv4Address(int(network[-1]) + 1).compressed
-    else:
-        return IPv6Address(int(network[-1]) + 1).compressed
-
-
-def _get_last_ip_in_previous_cidr(cidr: str) -> str:
-    # Python needs a little "help" inferring which type of IP address an integer value represents,
-    # thus we have the manual check below
-    network = ip_network(cidr)
-    if isinstance(network, IPv4Network):
-        return IPv4Address(int(network[0]) - 1).compressed
-    else:
-        return IPv6Address(int(network[0]) - 1).compressed
-
-
-def _get_encapsulating_cidr_with_prefix(ip: str, desired_prefix: int) -> str:
-    prefix = "/32" if isinstance(ip_address(ip), IPv4Address) else "/128"
-    return _get_cidr(ip_network(ip + prefix).supernet(new_prefix=desired_prefix))
+def _get_merged_cidr(cidr1: str, cidr2: str) -> Optional[str]:
+    # Two CIDR blocks can be merged if they are the two halves of the same larger CIDR block
+    a = get_network(cidr1)
+    b = get_network(cidr2)
+    if a.prefixlen != b.prefixlen or a.prefixlen == 0 or not _cidrs_are_adjacent(cidr1, cidr2):
+        return None
+    supernet = a.supernet()
+    return _get_cidr(supernet) if b.subnet_of(supernet) else None  # type: ignore
 
 
-def _cidr_overlaps_any(cidr_list: list[str], cidr: str) -> bool:
-    for cidr_to_check in cidr_list:
-        if ip_network(cidr_to_check).overlaps(ip_network(cidr)):
-            return True
-    return False
+def _is_cidr_inside(parent_cidr: str, child_cidr: str) -> bool:
+    parent = get_network(parent_cidr)
+    child = get_network(child_cidr)
+    # VPCs may contain CIDR blocks of both IP versions (e.g. in dual-stack mode)
+    return child.version == parent.version and child.subnet_of(parent)  # type: ignore
 
 
-def _get_previous_cidr_with_prefix(cidr: str, desired_prefix: int) -> Optional[str]:
-    if desired_prefix > get_prefix(cidr):
-        return None
-    else:
-        try:
-            return _get_encapsulating_cidr_with_prefix(
-                _get_last_ip_in_previous_cidr(
-                    _get_cidr(ip_network(cidr).supernet(new_prefix=desired_prefix))
-                ),
-                desired_prefix
-            )
-        except AddressValueError:
-            return None
+def sort_cidrs(cidrs: list[str]) -> list[str]:
+    ret = cidrs.copy()
+    # Networks order themselves by network address and then by netmask (just like
+    # compare_networks), so the cached networks can be used as sort keys directly
+    ret.sort(key=get_network)
+    return ret
 
 
-def _get_next_cidr_with_prefix(cidr: str, desired_prefix: int) -> Optional[str]:
-    if desired_prefix > get_prefix(cidr):
-        return None
-    else:
-        try:
-            return _get_encapsulating_cidr_with_prefix(
-                _get_first_ip_in_next_cidr(
-                    _get_cidr(ip_network(cidr).supernet(new_prefix=desired_prefix))
-                ),
-                desired_prefix
-            )
-        except AddressValueError:
-            return None
+def select_cidrs(cidrs: list[str], *, top: Optional[int], min_size: Optional[int]) -> list[str]:
+    if top is not None and top < 1:
+        # A negative top would otherwise silently drop the smallest CIDR blocks when slicing
+        raise ValueError(f"top must be a positive integer, not {top}")
+    ret = cidrs if min_size is None else [c for c in cidrs if get_ip_count(c) >= min_size]
+    if top is not None:
+        # Within a single IP version, a smaller prefix always means a larger CIDR block, and because
+        # sorting is stable, equally-sized CIDR blocks retain their relative order
+        ret = sorted(ret, key=get_prefix)[:top]
+    return ret
 
 
-def _is_cidr_inside(parent_cidr: str, child_cidr: str) -> bool:
-    return ip_network(child_cidr).subnet_of(ip_network(parent_cidr))  # type: ignore
+def get_ip_count(cidr: str) -> int:
+    return get_network(cidr).num_addresses
 
 
-def sort_cidrs(cidrs: list[str]) -> list[str]:
-    ret = cidrs.copy()
-    ret.sort(
-        key=cmp_to_key(lambda a, b: ip_network(a).compare_networks(ip_network(b)))  # type: ignore
-    )
+def merge_ip_ranges(ranges: Iterable[IPRange]) -> list[IPRange]:
+    # Returns the given ranges sorted, with overlapping and adjacent ranges merged together
+    ret: list[IPRange] = []
+    for start, end in sorted(ranges):
+        if len(ret) > 0 and start <= ret[-1][1] + 1:
+            ret[-1] = (ret[-1][0], max(ret[-1][1], end))
+        else:
+            ret.append((start, end))
     return ret
 
 
-def get_ip_count(cidr: str) -> int:
-    return ip_network(cidr).num_addresses
+def subtract_ip_ranges(ranges: list[IPRange], ranges_to_remove: list[IPRange]) -> list[IPRange]:
+    """
+    Removes the IPs in ranges_to_remove from ranges. Both lists must be sorted and contain no
+    overlapping ranges (e.g. the output of merge_ip_ranges), which allows this to be done in a
+    single merge-style sweep over both lists.
+    """
+    ret: list[IPRange] = []
+    i = 0
+    for start, end in ranges:
+        # Skip the ranges to remove that lie entirely before the current range
+        while i < len(ranges_to_remove) and ranges_to_remove[i][1] < start:
+            i += 1
+        current = start
+        j = i
+        while j < len(ranges_to_remove) and ranges_to_remove[j][0] <= end:
+            if ranges_to_remove[j][0] > current:
+                ret.append((current, ranges_to_remove[j][0] - 1))
+            current = max(current, ranges_to_remove[j][1] + 1)
+            j += 1
+        if current <= end:
+            ret.append((current, end))
+    return ret
 
 
-def get_prefix(cidr: str) -> int:
-    return int(cidr.split("/")[1])
+def get_free_ip_ranges(vpc_cidr: str, subnet_cidrs: list[str]) -> list[IPRange]:
+    return subtract_ip_ranges([get_ip_range(vpc_cidr)],
+                              merge_ip_ranges(get_ip_range(cidr) for cidr in subnet_cidrs))
+
+
+def convert_ip_ranges_to_cidrs(ranges: Iterable[IPRange], *, ipv6: bool) -> list[str]:
+    # Each range is converted to the smallest possible list of CIDR blocks that covers it exactly
+    address_type = IPv6Address if ipv6 else IPv4Address
+    return [
+        _get_cidr(network)
+        for start, end in ranges
+        for network in summarize_address_range(address_type(start), address_type(end))
+    ]
+
+
+def select_ip_version(vpc: VPC, *, ipv6: bool) -> VPC:
+    version = 6 if ipv6 else 4
+    subnet_usage = vpc.subnet_usage
+    if subnet_usage is not None:
+        subnet_usage = [u for u in subnet_usage if get_network(u.cidr).version == version]
+    return VPC(
+        id=vpc.id,
+        name=vpc.name,
+        cidrs=[c for c in vpc.cidrs if get_network(c).version == version],
+        subnets=[s for s in vpc.subnets if get_network(s).version == version],
+        account=vpc.account,
+        region=vpc.region,
+        subnet_usage=subnet_usage
+    )
 
 
-def split_out_individual_cidrs(vpcs: list[VPC]) -> list[SingleCIDRVPC]:
+def split_out_individual_cidrs(vpcs: Iterable[VPC]) -> list[SingleCIDRVPC]:
     ret = []
 
     for vpc in vpcs:
         for cidr in vpc.cidrs:
+            subnet_usage = vpc.subnet_usage
+            if subnet_usage is not None:
+                subnet_usage = [u for u in subnet_usage if _is_cidr_inside(cidr, u.cidr)]
             ret.append(
                 SingleCIDRVPC(
                     id=vpc.id,
                     name=vpc.name,
                     cidr=cidr,
-                    subnets=[s for s in vpc.subnets if _is_cidr_inside(cidr, s)]
+                    subnets=[s for s in vpc.subnets if _is_cidr_inside(cidr, s)],
+                    account=vpc.account,
+                    region=vpc.region,
+                    subnet_usage=subnet_usage
                 )
             )
 
     return ret
 
 
-def find_subnet_holes(vpc_cidr: str, subnet_cidrs: list[str]) -> list[str]:
-    if len(subnet_cidrs) == 0:
-        return [vpc_cidr]
-
-    ret: list[str] = []
-
-    for cidr in subnet_cidrs:
-        # Check on the left of the current CIDR
-        for new_prefix in range(1, get_prefix(cidr) + 1):
-            candidate = _get_previous_cidr_with_prefix(cidr, new_prefix)
-            if candidate is not None and \
-                    _is_cidr_inside(vpc_cidr, candidate) and \
-                    not _cidr_overlaps_any(subnet_cidrs, candidate) and \
-                    not _cidr_overlaps_any(ret, candidate):
-                ret.append(candidate)
+def check_backend(backend: str) -> None:
+    if backend not in BACKENDS:
+        raise ValueError(f"'{backend}' is not one of the supported backends: {', '.join(BACKENDS)}")
+
+
+def find_subnet_holes(vpc_cidr: str,
+                      subnet_cidrs: list[str],
+                      *,
+                      backend: str = "ranges") -> list[str]:
+    """
+    Returns the free address space of the VPC CIDR block as the fewest possible CIDR blocks (in
+    order). The free address space is computed as merged integer IP ranges (using the given backend,
+    which must be one of BACKENDS), and each range is then converted to the minimal list of aligned
+    CIDR blocks covering it. Since the ranges are maximal (i.e. no two of them are adjacent), no two
+    of the resulting CIDR blocks can be merged.
+    """
+    check_backend(backend)
+
+    # Sparse VPC CIDR blocks whose bitmap would be too large fall back to the ranges backend
+    bitmap = build_bitmap(vpc_cidr, subnet_cidrs) if backend == "bitmap" else None
+    if bitmap is not None:
+        free_ranges = bitmap.get_free_ip_ranges()
+    else:
+        free_ranges = get_free_ip_ranges(vpc_cidr, subnet_cidrs)
+    return convert_ip_ranges_to_cidrs(free_ranges, ipv6=get_ip_version(vpc_cidr) == 6)
+
+
+def verify_subnet_holes(vpc_cidr: str, subnet_cidrs: list[str], holes: list[str]) -> None:
+    """
+    Checks that the given holes are the minimal CIDR cover of the free address space of the VPC
+    CIDR block: they must cover exactly the free address space without overlapping one another, and
+    no two of them may be mergeable into a larger CIDR block. A ValueError is raised otherwise.
+    """
+    free_ranges = get_free_ip_ranges(vpc_cidr, subnet_cidrs)
+    free_ip_count = sum(last_ip - first_ip + 1 for first_ip, last_ip in free_ranges)
+    if merge_ip_ranges(get_ip_range(cidr) for cidr in holes) != free_ranges or \
+            sum(get_ip_count(cidr) for cidr in holes) != free_ip_count:
+        raise ValueError(
+            f"The available CIDR blocks of '{vpc_cidr}' do not exactly cover its free address space"
+        )
+
+    # CIDR blocks that can be merged are always next to each other once sorted
+    sorted_holes = sort_cidrs(holes)
+    for cidr1, cidr2 in zip(sorted_holes, sorted_holes[1:]):
+        merged_cidr = _get_merged_cidr(cidr1, cidr2)
+        if merged_cidr is not None:
+            raise ValueError((
+                f"The available CIDR blocks '{cidr1}' and '{cidr2}' of '{vpc_cidr}' are not "
+                f"minimal because they can be merged into '{merged_cidr}'"
+            ))
 
-        # Check on the right of the current CIDR
-        for new_prefix in range(1, get_prefix(cidr) + 1):
-            candidate = _get_next_cidr_with_prefix(cidr, new_prefix)
-            if candidate is not None and \
-                    _is_cidr_inside(vpc_cidr, candidate) and \
-                    not _cidr_overlaps_any(subnet_cidrs, candidate) and \
-                    not _cidr_overlaps_any(ret, candidate):
-                ret.append(candidate)
 
-    return sort_cidrs(ret)
+def _get_unconverted_cidr_message(readable_vpc_name: str, cidr: str, prefix: int) -> Optional[str]:
+    # Returns a message explaining why the CIDR cannot be converted to the prefix, if it cannot be
+    old_prefix = get_prefix(cidr)
+    if old_prefix > prefix:
+        return (
+            f"Note: skipping the CIDR '{cidr}' in the VPC '{readable_vpc_name}' because its "
+            f"prefix ({old_prefix}) is numerically greater than the requested prefix ({prefix})"
+        )
+    elif prefix - old_prefix > 8:
+        return (
+            f"Warning: skipping the CIDR '{cidr}' in the VPC '{readable_vpc_name}' because its "
+            f"prefix is only {old_prefix} and converting it to a list of CIDRs whose prefixes "
+            f"are {prefix} will result in a list containing {2**(prefix-old_prefix)} CIDRs!"
+        )
+    return None
 
 
 def break_down_to_desired_prefix(readable_vpc_name: str, cidrs: list[str],
@@ -149,29 +228,96 @@ def break_down_to_desired_prefix(readable_vpc_name: str, cidrs: list[str],
     cidrs_not_converted_to_prefix: list[str] = []
     messages: list[str] = []
     for cidr in cidrs:
-        old_prefix = get_prefix(cidr)
-        if old_prefix > prefix:
-            messages.append((
-                f"Note: skipping the CIDR '{cidr}' in the VPC '{readable_vpc_name}' because its "
-                f"prefix ({old_prefix}) is numerically greater than the requested prefix ({prefix})"
-            ))
-            cidrs_not_converted_to_prefix.append(cidr)
-            continue
-        elif prefix - old_prefix > 8:
-            messages.append((
-                f"Warning: skipping the CIDR '{cidr}' in the VPC '{readable_vpc_name}' because its "
-                f"prefix is only {old_prefix} and converting it to a list of CIDRs whose prefixes "
-                f"are {prefix} will result in a list containing {2**(prefix-old_prefix)} CIDRs!"
-            ))
+        message = _get_unconverted_cidr_message(readable_vpc_name, cidr, prefix)
+        if message is not None:
+            messages.append(message)
             cidrs_not_converted_to_prefix.append(cidr)
             continue
 
-        for sub in ip_network(cidr).subnets(new_prefix=prefix):
+        for sub in get_network(cidr).subnets(new_prefix=prefix):
             converted_cidrs.append(_get_cidr(sub))
 
     return converted_cidrs, cidrs_not_converted_to_prefix, messages
 
 
+def _compute_subnet_cidr_gaps(
+    vpc: SingleCIDRVPC, *, prefix: Optional[int], verify: bool, backend: str
+) -> tuple[list[str], list[str], list[str]]:
+    # yapf: disable
+    subnet_cidr_gaps = find_subnet_holes(
+        vpc.cidr,
+        vpc.subnets,
+        backend=backend
+    )
+    # yapf: enable
+    if verify:
+        verify_subnet_holes(vpc.cidr, vpc.subnets, subnet_cidr_gaps)
+    if prefix is None:
+        return subnet_cidr_gaps, [], []
+    return break_down_to_desired_prefix(vpc.readable_name, subnet_cidr_gaps, prefix)
+
+
+def iter_subnet_cidr_gaps(
+    vpcs: Iterable[VPC],
+    *,
+    prefix: Optional[int],
+    verify: bool = False,
+    cache: Optional[ResultCache] = None,
+    backend: str = "ranges"
+) -> Iterator[tuple[SingleCIDRVPC, list[str], list[str], list[str]]]:
+    """
+    Lazily computes the available CIDR blocks of each VPC CIDR block, yielding a tuple of the VPC,
+    its available CIDR blocks, the CIDR blocks which were not converted to the given prefix, and any
+    messages as soon as that VPC has been processed. If verify is True, the available CIDR blocks of
+    each VPC CIDR block are checked with verify_subnet_holes before being converted to the prefix.
+    If a cache is given, only VPC CIDR blocks whose results are not already cached are computed
+    (unless verify is True, in which case every result is computed and verified). The backend
+    determines how the available CIDR blocks are computed (see find_subnet_holes), but not what
+    they are, so cached results are shared between backends.
+    """
+    for vpc_data in vpcs:
+        for vpc in split_out_individual_cidrs([vpc_data]):
+            if cache is None:
+                yield vpc, *_compute_subnet_cidr_gaps(
+                    vpc, prefix=prefix, verify=verify, backend=backend
+                )
+                continue
+
+            ipv6 = get_ip_version(vpc.cidr) == 6
+            key = get_cache_key(vpc.cidr, vpc.subnets, ipv6=ipv6, prefix=prefix)
+            cached_result = None if verify else cache.get(key)
+            if cached_result is None:
+                cidrs, unconverted_cidrs, messages = _compute_subnet_cidr_gaps(
+                    vpc, prefix=prefix, verify=verify, backend=backend
+                )
+                cache.put(key, (cidrs, unconverted_cidrs))
+            else:
+                # Messages are not cached because they contain the name of the VPC, which may differ
+                # between VPCs that share the same cached result
+                cidrs, unconverted_cidrs = cached_result
+                messages = [] if prefix is None else [
+                    message for message in (
+                        _get_unconverted_cidr_message(vpc.readable_name, cidr, prefix)
+                        for cidr in unconverted_cidrs
+                    ) if message is not None
+                ]
+            yield vpc, cidrs, unconverted_cidrs, messages
+
+
+def iter_prefix_breakdowns(
+    results: Iterable[tuple[SingleCIDRVPC, list[str], list[str], list[str]]], prefixes: list[int]
+) -> Iterator[tuple[int, SingleCIDRVPC, list[str], list[str], list[str]]]:
+    """
+    Converts the available CIDR blocks of each VPC CIDR block (as yielded by iter_subnet_cidr_gaps
+    without a prefix) to each of the given prefixes, yielding a tuple of the prefix followed by what
+    iter_subnet_cidr_gaps would have yielded for that prefix. This way, the available CIDR blocks of
+    each VPC CIDR block are only computed once regardless of how many prefixes are requested.
+    """
+    for vpc, cidrs, _, _ in results:
+        for prefix in prefixes:
+            yield prefix, vpc, *break_down_to_desired_prefix(vpc.readable_name, cidrs, prefix)
+
+
 def convert_to_json_format(
     subnet_cidr_gaps: dict[SingleCIDRVPC, list[str]],
     cidrs_not_converted_to_prefix: list[str],
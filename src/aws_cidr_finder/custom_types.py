@@ -1,25 +1,64 @@
 from typing import Optional, TypedDict
 
 
+class SubnetUsage:
+    """
+    This class is a compact record of how many IP addresses are still available in a subnet, as
+    reported by AWS in the AvailableIpAddressCount field of the subnet (which pertains to IPv4).
+    """
+    __slots__ = ("id", "cidr", "available_ip_count")
+
+    def __init__(self, *, id: str, cidr: str, available_ip_count: int):
+        self.id = id
+        self.cidr = cidr
+        self.available_ip_count = available_ip_count
+
+
 class VPC:
     """
     This class exists to serve an intermediate representation of VPC information originating from
     AWS itself (Boto). Instances of this class are always destined to be converted into instances of
     the SingleCIDRVPC class.
     """
-    def __init__(self, *, id: str, name: Optional[str], cidrs: list[str], subnets: list[str]):
+    def __init__(
+        self,
+        *,
+        id: str,
+        name: Optional[str],
+        cidrs: list[str],
+        subnets: list[str],
+        account: Optional[str] = None,
+        region: Optional[str] = None,
+        subnet_usage: Optional[list[SubnetUsage]] = None
+    ):
         self.id = id
         self.name = name
         self.cidrs = cidrs
         self.subnets = subnets
+        self.account = account
+        self.region = region
+        self.subnet_usage = subnet_usage
 
 
 class SingleCIDRVPC:
-    def __init__(self, *, id: str, name: Optional[str], cidr: str, subnets: list[str]):
+    def __init__(
+        self,
+        *,
+        id: str,
+        name: Optional[str],
+        cidr: str,
+        subnets: list[str],
+        account: Optional[str] = None,
+        region: Optional[str] = None,
+        subnet_usage: Optional[list[SubnetUsage]] = None
+    ):
         self.id = id
         self.name = name
         self.cidr = cidr
         self.subnets = subnets
+        self.account = account
+        self.region = region
+        self.subnet_usage = subnet_usage
 
     @property
     def readable_name(self) -> str:
@@ -36,6 +75,57 @@ class SingleCIDRVPC:
         return hash((self.id, self.cidr))
 
 
+class VPCCIDRResult:
+    """
+    This class represents the available CIDR blocks of a single VPC CIDR block, as yielded by the
+    iter_available_cidrs function. It defines __slots__ because callers may process a very large
+    number of instances.
+    """
+    __slots__ = (
+        "id",
+        "name",
+        "cidr",
+        "account",
+        "region",
+        "available_cidr_blocks",
+        "cidrs_not_converted_to_prefix",
+        "messages"
+    )
+
+    def __init__(
+        self,
+        *,
+        id: str,
+        name: Optional[str],
+        cidr: str,
+        account: Optional[str],
+        region: Optional[str],
+        available_cidr_blocks: list[str],
+        cidrs_not_converted_to_prefix: list[str],
+        messages: list[str]
+    ):
+        self.id = id
+        self.name = name
+        self.cidr = cidr
+        self.account = account
+        self.region = region
+        self.available_cidr_blocks = available_cidr_blocks
+        self.cidrs_not_converted_to_prefix = cidrs_not_converted_to_prefix
+        self.messages = messages
+
+    @property
+    def readable_name(self) -> str:
+        return self.id if self.name is None else self.name
+
+    def __repr__(self) -> str:
+        return f"{self.readable_name} ({self.cidr})"
+
+
+VPCData = TypedDict(
+    "VPCData", {
+        "id": str, "name": Optional[str], "cidrs": list[str], "subnets": list[str]
+    }
+)
 VPCCIDRData = TypedDict(
     "VPCCIDRData", {
         "id": str, "name": Optional[str], "cidr": str, "available_cidr_blocks": list[str]
@@ -48,3 +138,15 @@ JSONOutput = TypedDict(
         "data": list[VPCCIDRData]
     }
 )
+PrefixJSONOutput = TypedDict(
+    "PrefixJSONOutput",
+    {
+        "prefix": int,
+        "messages": list[str],
+        "cidrs_not_converted_to_prefix": list[str],
+        "data": list[VPCCIDRData]
+    }
+)
+MultiplePrefixJSONOutput = TypedDict(
+    "MultiplePrefixJSONOutput", {"prefixes": list[PrefixJSONOutput]}
+)
@@ -0,0 +1,69 @@
+from typing import Iterable, Iterator, Optional, TypedDict
+
+from aws_cidr_finder import core
+from aws_cidr_finder.custom_types import SingleCIDRVPC, VPC
+
+VPCCIDRDiffData = TypedDict(
+    "VPCCIDRDiffData",
+    {
+        "id": str,
+        "name": Optional[str],
+        "cidr": str,
+        "status": str,
+        "freed_cidr_blocks": list[str],
+        "consumed_cidr_blocks": list[str]
+    }
+)
+
+
+def _get_free_ip_ranges(vpc: Optional[SingleCIDRVPC]) -> list[core.IPRange]:
+    if vpc is None:
+        return []
+    return core.get_free_ip_ranges(vpc.cidr, vpc.subnets)
+
+
+def _index_vpc_cidrs(vpcs: Iterable[VPC], *, ipv6: bool) -> dict[tuple[str, str], SingleCIDRVPC]:
+    selected_vpcs = (core.select_ip_version(vpc, ipv6=ipv6) for vpc in vpcs)
+    return {(vpc.id, vpc.cidr): vpc for vpc in core.split_out_individual_cidrs(selected_vpcs)}
+
+
+def diff_vpcs(old_vpcs: Iterable[VPC], new_vpcs: Iterable[VPC], *,
+              ipv6: bool) -> Iterator[tuple[SingleCIDRVPC, str, list[str], list[str]]]:
+    """
+    Compares the free address space of each VPC CIDR block between two topology snapshots, yielding
+    the VPC CIDR block, its status ("added", "removed", or "changed"), the CIDR blocks that became
+    free, and the CIDR blocks that stopped being free. VPC CIDR blocks are matched on their VPC ID
+    and CIDR block, and those whose free address space did not change are not yielded.
+    """
+    old = _index_vpc_cidrs(old_vpcs, ipv6=ipv6)
+    new = _index_vpc_cidrs(new_vpcs, ipv6=ipv6)
+
+    # VPC CIDR blocks are reported in the order of the new snapshot, followed by removed ones
+    for key in list(new) + [key for key in old if key not in new]:
+        old_vpc, new_vpc = old.get(key), new.get(key)
+        old_free = _get_free_ip_ranges(old_vpc)
+        new_free = _get_free_ip_ranges(new_vpc)
+        # The free IP ranges are sorted and disjoint, so the differences can be computed with a
+        # single sweep over each pair of lists rather than by comparing lists of CIDR blocks
+        freed = core.subtract_ip_ranges(new_free, old_free)
+        consumed = core.subtract_ip_ranges(old_free, new_free)
+        if old_vpc is None:
+            yield new[key], "added", core.convert_ip_ranges_to_cidrs(freed, ipv6=ipv6), []
+        elif new_vpc is None:
+            yield old_vpc, "removed", [], core.convert_ip_ranges_to_cidrs(consumed, ipv6=ipv6)
+        elif len(freed) > 0 or len(consumed) > 0:
+            yield new_vpc, "changed", core.convert_ip_ranges_to_cidrs(freed, ipv6=ipv6), \
+                core.convert_ip_ranges_to_cidrs(consumed, ipv6=ipv6)
+
+
+def convert_to_json_format(
+    vpc: SingleCIDRVPC, status: str, freed_cidrs: list[str], consumed_cidrs: list[str]
+) -> VPCCIDRDiffData:
+    return {
+        "id": vpc.id,
+        "name": vpc.name,
+        "cidr": vpc.cidr,
+        "status": status,
+        "freed_cidr_blocks": freed_cidrs,
+        "consumed_cidr_blocks": consumed_cidrs
+    }
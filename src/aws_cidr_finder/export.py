@@ -0,0 +1,76 @@
+import csv
+from typing import Any, Iterable, Iterator, Optional, TextIO
+
+from aws_cidr_finder import core
+from aws_cidr_finder.custom_types import SingleCIDRVPC
+
+EXPORT_COLUMNS: list[str] = [
+    "account", "region", "vpc_id", "vpc_cidr", "free_cidr", "prefix", "ip_count"
+]
+ExportRow = tuple[Optional[str], Optional[str], str, str, str, int, int]
+
+
+def get_export_rows(vpc: SingleCIDRVPC, cidrs: list[str]) -> Iterator[ExportRow]:
+    for cidr in cidrs:
+        yield vpc.account, vpc.region, vpc.id, vpc.cidr, cidr, core.get_prefix(cidr), \
+            core.get_ip_count(cidr)
+
+
+def write_csv(results: Iterable[tuple[SingleCIDRVPC, list[str]]], stream: TextIO) -> None:
+    """
+    Writes one flat CSV row per available CIDR block to the given stream. Rows are written as soon
+    as each VPC's results are available rather than after every VPC has been processed.
+    """
+    writer = csv.writer(stream)
+    writer.writerow(EXPORT_COLUMNS)
+    for vpc, cidrs in results:
+        writer.writerows(get_export_rows(vpc, cidrs))
+        stream.flush()
+
+
+def _import_pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        raise ImportError((
+            "Columnar export requires pyarrow, which can be installed using the 'columnar' extra "
+            "(e.g. pip install aws-cidr-finder[columnar])"
+        ))
+
+
+def write_columnar(
+    results: Iterable[tuple[SingleCIDRVPC, list[str]]], path: str, *, file_format: str
+) -> None:
+    """
+    Writes one flat row per available CIDR block to the given path as either an Apache Parquet file
+    (file_format="parquet") or an Apache Arrow IPC file (file_format="arrow"). Each VPC's rows are
+    written as a separate record batch as soon as they are available.
+    """
+    pa = _import_pyarrow()
+    # IPv6 CIDR blocks can contain up to 2^128 IP addresses, which does not fit in any of Arrow's
+    # integer types, hence the use of a decimal type for the ip_count column
+    # yapf: disable
+    schema = pa.schema([
+        ("account", pa.string()),
+        ("region", pa.string()),
+        ("vpc_id", pa.string()),
+        ("vpc_cidr", pa.string()),
+        ("free_cidr", pa.string()),
+        ("prefix", pa.uint8()),
+        ("ip_count", pa.decimal256(39, 0))
+    ])
+    # yapf: enable
+    if file_format == "parquet":
+        writer = pa.parquet.ParquetWriter(path, schema)
+    else:
+        writer = pa.ipc.new_file(path, schema)
+
+    with writer:
+        for vpc, cidrs in results:
+            rows = list(get_export_rows(vpc, cidrs))
+            if len(rows) > 0:
+                columns = [list(column) for column in zip(*rows)]
+                writer.write_batch(pa.record_batch(columns, schema=schema))
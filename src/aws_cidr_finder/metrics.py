@@ -0,0 +1,47 @@
+from threading import Lock
+
+
+class Metrics:
+    """
+    This class collects counters describing the work performed during a single run of
+    aws-cidr-finder (AWS API calls and result cache usage). Instances are safe to share between
+    threads, since AWS API calls may be issued concurrently.
+    """
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.api_calls = 0
+        self.retries = 0
+        self.throttles = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def record_api_call(self, *, retries: int) -> None:
+        with self._lock:
+            self.api_calls += 1
+            self.retries += retries
+
+    def record_throttle(self) -> None:
+        with self._lock:
+            self.throttles += 1
+
+    def record_cache_hit(self) -> None:
+        with self._lock:
+            self.cache_hits += 1
+
+    def record_cache_miss(self) -> None:
+        with self._lock:
+            self.cache_misses += 1
+
+    def to_dict(self) -> dict[str, int]:
+        return {
+            "api_calls": self.api_calls,
+            "retries": self.retries,
+            "throttles": self.throttles,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses
+        }
+
+    def summary(self) -> str:
+        return ", ".join([
+            f"{key.replace('_', ' ')}: {value}" for key, value in self.to_dict().items()
+        ])
@@ -0,0 +1,28 @@
+from functools import lru_cache
+from ipaddress import ip_network, IPv4Network, IPv6Network
+from typing import Union
+
+# An inclusive range of IP addresses, represented by the integer values of its first and last IPs
+IPRange = tuple[int, int]
+
+
+@lru_cache(maxsize=65536)
+def get_network(cidr: str) -> Union[IPv4Network, IPv6Network]:
+    # The same VPC and subnet CIDRs are parsed over and over again while searching for holes (and
+    # when processing many VPCs in one batch), so parsed networks are cached. This is safe because
+    # network objects are immutable.
+    return ip_network(cidr)
+
+
+def get_ip_range(cidr: str) -> IPRange:
+    # Returns the first and last IP addresses of the CIDR block as integers (both inclusive)
+    network = get_network(cidr)
+    return int(network.network_address), int(network.broadcast_address)
+
+
+def get_prefix(cidr: str) -> int:
+    return int(cidr.split("/")[1])
+
+
+def get_ip_version(cidr: str) -> int:
+    return get_network(cidr).version
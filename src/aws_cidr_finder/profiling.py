@@ -0,0 +1,68 @@
+import cProfile
+import pstats
+import sys
+from contextlib import AbstractContextManager, nullcontext
+from typing import Any, Iterable, Iterator, Optional, TextIO, TypeVar
+
+T = TypeVar("T")
+
+
+class Profiler:
+    """
+    This class records a cProfile profile of the phases of a run of aws-cidr-finder which retrieve
+    data from AWS (boto_wrapper) and compute available CIDR blocks (core), so that time spent
+    formatting and writing output does not dilute the profile. Phases may be nested. Note that
+    cProfile only profiles the thread which enabled it, so AWS API calls made by worker threads
+    appear as time spent waiting for those threads.
+    """
+    def __init__(self) -> None:
+        self._profile = cProfile.Profile()
+        self._depth = 0
+
+    def __enter__(self) -> "Profiler":
+        if self._depth == 0:
+            self._profile.enable()
+        self._depth += 1
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            self._profile.disable()
+
+    def iter_profiled(self, iterable: Iterable[T]) -> Iterator[T]:
+        # Lazy phases are only profiled while they produce each item, not while the consumer is
+        # handling that item
+        iterator = iter(iterable)
+        while True:
+            with self:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def dump(self, path: str) -> None:
+        # The resulting file can be loaded with pstats (or tools like snakeviz)
+        self._profile.dump_stats(path)
+
+    def print_top(self, count: int, *, stream: Optional[TextIO] = None) -> None:
+        # Prints the count functions in which the most time was spent (excluding their callees)
+        if count < 1:
+            # pstats would otherwise slice its list of functions with the count
+            raise ValueError(f"count must be a positive integer, not {count}")
+        stream = sys.stderr if stream is None else stream
+        if len(self._profile.getstats()) == 0:
+            # pstats cannot be constructed from a profile which has not recorded anything
+            print("No profile data was recorded.", file=stream)
+            return
+        stats = pstats.Stats(self._profile, stream=stream)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(count)
+
+
+def profile_phase(profiler: Optional[Profiler]) -> AbstractContextManager[Any]:
+    return nullcontext() if profiler is None else profiler
+
+
+def profile_iterable(iterable: Iterable[T], profiler: Optional[Profiler]) -> Iterable[T]:
+    return iterable if profiler is None else profiler.iter_profiled(iterable)
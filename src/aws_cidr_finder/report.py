@@ -0,0 +1,173 @@
+from typing import Iterable, Optional, TypedDict
+
+from aws_cidr_finder import core
+from aws_cidr_finder.custom_types import SingleCIDRVPC
+
+CapacityData = TypedDict(
+    "CapacityData",
+    {
+        "total_ip_count": int,
+        "used_ip_count": int,
+        "free_ip_count": int,
+        "largest_free_block_ip_count": int,
+        "largest_free_fragment_ip_count": int,
+        "free_fragment_count": int,
+        "fragmentation_index": float
+    }
+)
+VPCCapacityData = TypedDict(
+    "VPCCapacityData",
+    {
+        "id": str,
+        "name": Optional[str],
+        "cidr": str,
+        "account": Optional[str],
+        "region": Optional[str],
+        "capacity": CapacityData
+    }
+)
+AccountRegionCapacityData = TypedDict(
+    "AccountRegionCapacityData", {
+        "account": Optional[str], "region": Optional[str], "capacity": CapacityData
+    }
+)
+CapacityReportJSON = TypedDict(
+    "CapacityReportJSON",
+    {
+        "vpcs": list[VPCCapacityData],
+        "accounts": list[AccountRegionCapacityData],
+        "total": CapacityData
+    }
+)
+
+
+class CapacityStats:
+    """
+    This class accumulates capacity and fragmentation figures for a VPC CIDR block (or a rollup of
+    several VPC CIDR blocks). Available CIDR blocks are fed in one at a time, in address order, and
+    only a constant amount of state is kept regardless of how many there are.
+    """
+    __slots__ = (
+        "total_ip_count",
+        "free_ip_count",
+        "largest_free_block_ip_count",
+        "largest_free_fragment_ip_count",
+        "free_fragment_count",
+        "_last_free_ip",
+        "_current_fragment_ip_count"
+    )
+
+    def __init__(self, *, total_ip_count: int = 0):
+        self.total_ip_count = total_ip_count
+        self.free_ip_count = 0
+        self.largest_free_block_ip_count = 0
+        self.largest_free_fragment_ip_count = 0
+        self.free_fragment_count = 0
+        self._last_free_ip: Optional[int] = None
+        self._current_fragment_ip_count = 0
+
+    @property
+    def used_ip_count(self) -> int:
+        return self.total_ip_count - self.free_ip_count
+
+    @property
+    def fragmentation_index(self) -> float:
+        # 0 means all free space is in a single contiguous fragment, and values approaching 1 mean
+        # the free space is split into many small fragments (relative to the total free space)
+        if self.free_ip_count == 0:
+            return 0.0
+        return 1 - self.largest_free_fragment_ip_count / self.free_ip_count
+
+    def add_available_cidr(self, cidr: str) -> None:
+        first_ip, last_ip = core.get_ip_range(cidr)
+        ip_count = last_ip - first_ip + 1
+        self.free_ip_count += ip_count
+        self.largest_free_block_ip_count = max(self.largest_free_block_ip_count, ip_count)
+        # Available CIDR blocks that are directly adjacent to one another belong to the same
+        # contiguous range of free IP addresses (i.e. the same fragment)
+        if self._last_free_ip is None or first_ip != self._last_free_ip + 1:
+            self.free_fragment_count += 1
+            self._current_fragment_ip_count = 0
+        self._current_fragment_ip_count += ip_count
+        self.largest_free_fragment_ip_count = max(
+            self.largest_free_fragment_ip_count, self._current_fragment_ip_count
+        )
+        self._last_free_ip = last_ip
+
+    def add_stats(self, other: "CapacityStats") -> None:
+        self.total_ip_count += other.total_ip_count
+        self.free_ip_count += other.free_ip_count
+        self.largest_free_block_ip_count = max(
+            self.largest_free_block_ip_count, other.largest_free_block_ip_count
+        )
+        # Fragments never span more than one VPC CIDR block, so they are not merged across stats
+        self.largest_free_fragment_ip_count = max(
+            self.largest_free_fragment_ip_count, other.largest_free_fragment_ip_count
+        )
+        self.free_fragment_count += other.free_fragment_count
+
+    def to_json(self) -> CapacityData:
+        return {
+            "total_ip_count": self.total_ip_count,
+            "used_ip_count": self.used_ip_count,
+            "free_ip_count": self.free_ip_count,
+            "largest_free_block_ip_count": self.largest_free_block_ip_count,
+            "largest_free_fragment_ip_count": self.largest_free_fragment_ip_count,
+            "free_fragment_count": self.free_fragment_count,
+            "fragmentation_index": round(self.fragmentation_index, 4)
+        }
+
+    def summary(self) -> str:
+        return (
+            f"{self.total_ip_count} total IPs, {self.used_ip_count} used, "
+            f"{self.free_ip_count} free (largest free block: "
+            f"{self.largest_free_block_ip_count} IPs, largest free fragment: "
+            f"{self.largest_free_fragment_ip_count} IPs, "
+            f"free fragments: {self.free_fragment_count}, "
+            f"fragmentation index: {self.fragmentation_index:.4f})"
+        )
+
+
+def get_vpc_capacity(vpc: SingleCIDRVPC, available_cidrs: Iterable[str]) -> CapacityStats:
+    stats = CapacityStats(total_ip_count=core.get_ip_count(vpc.cidr))
+    for cidr in available_cidrs:
+        stats.add_available_cidr(cidr)
+    return stats
+
+
+class CapacityReport:
+    """
+    This class rolls the capacity of individual VPC CIDR blocks up per account/region and across
+    every VPC CIDR block (i.e. organization-wide).
+    """
+    def __init__(self) -> None:
+        self.vpcs: list[tuple[SingleCIDRVPC, CapacityStats]] = []
+        self.accounts: dict[tuple[Optional[str], Optional[str]], CapacityStats] = {}
+        self.total = CapacityStats()
+
+    def add_vpc(self, vpc: SingleCIDRVPC, available_cidrs: Iterable[str]) -> CapacityStats:
+        stats = get_vpc_capacity(vpc, available_cidrs)
+        self.vpcs.append((vpc, stats))
+        self.accounts.setdefault((vpc.account, vpc.region), CapacityStats()).add_stats(stats)
+        self.total.add_stats(stats)
+        return stats
+
+    def to_json(self) -> CapacityReportJSON:
+        # yapf: disable
+        return {
+            "vpcs": [{
+                "id": vpc.id,
+                "name": vpc.name,
+                "cidr": vpc.cidr,
+                "account": vpc.account,
+                "region": vpc.region,
+                "capacity": stats.to_json()
+            } for vpc, stats in self.vpcs],
+            "accounts": [{
+                "account": account,
+                "region": region,
+                "capacity": stats.to_json()
+            } for (account, region), stats in self.accounts.items()],
+            "total": self.total.to_json()
+        }
+        # yapf: enable
@@ -0,0 +1,43 @@
+from ipaddress import ip_network
+from typing import Iterable, Iterator
+
+from aws_cidr_finder import core
+
+_HEADERS: tuple[str, str] = ("CIDR", "IP Count")
+# This mirrors the minimum amount of padding that tabulate's "simple" format gives each header
+_MINIMUM_HEADER_PADDING: int = 2
+_MAXIMUM_IPV4_CIDR_WIDTH: int = len("255.255.255.255/32")
+_MAXIMUM_IPV6_CIDR_WIDTH: int = len("ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff/128")
+
+
+def get_column_widths(vpc_cidr: str) -> tuple[int, int]:
+    # Every row in a VPC's table describes a CIDR block inside the VPC's CIDR block, so the longest
+    # possible CIDR is determined by the IP version, and no IP count (including the total) can
+    # exceed the IP count of the VPC itself. This lets us size the columns before seeing any rows.
+    network = ip_network(vpc_cidr)
+    maximum_cidr_width = _MAXIMUM_IPV4_CIDR_WIDTH if network.version == 4 \
+        else _MAXIMUM_IPV6_CIDR_WIDTH
+    return (
+        max(len(_HEADERS[0]) + _MINIMUM_HEADER_PADDING, maximum_cidr_width),
+        max(len(_HEADERS[1]) + _MINIMUM_HEADER_PADDING, len(str(network.num_addresses)))
+    )
+
+
+def render_table(cidrs: Iterable[str], *, vpc_cidr: str) -> Iterator[str]:
+    """
+    Lazily renders a table of the given CIDR blocks (and their IP counts) followed by a total row.
+    Unlike tabulate, this does not need to see every row before producing output because the column
+    widths are derived from the VPC's CIDR block.
+    """
+    cidr_width, count_width = get_column_widths(vpc_cidr)
+
+    yield f"{_HEADERS[0]:<{cidr_width}}  {_HEADERS[1]:>{count_width}}"
+    yield f"{'-' * cidr_width}  {'-' * count_width}"
+
+    total = 0
+    for cidr in cidrs:
+        ip_count = core.get_ip_count(cidr)
+        total += ip_count
+        yield f"{cidr:<{cidr_width}}  {ip_count:>{count_width}}"
+
+    yield f"{'Total':<{cidr_width}}  {total:>{count_width}}"
@@ -0,0 +1,45 @@
+import json
+import os
+from typing import Iterable, Iterator, Union
+
+from aws_cidr_finder.custom_types import VPC, VPCData
+
+
+def to_vpc(vpc: Union[VPC, VPCData]) -> VPC:
+    if isinstance(vpc, VPC):
+        return vpc
+    return VPC(id=vpc["id"], name=vpc.get("name"), cidrs=vpc["cidrs"], subnets=vpc["subnets"])
+
+
+def to_vpc_data(vpc: VPC) -> VPCData:
+    return {"id": vpc.id, "name": vpc.name, "cidrs": vpc.cidrs, "subnets": vpc.subnets}
+
+
+def save_topology(vpcs: Iterable[VPC], path: str) -> Iterator[VPC]:
+    """
+    Passes the given VPCs through unchanged while writing them to the given path as a JSON array of
+    VPCData objects (i.e. a topology snapshot). Each VPC is written to a temporary file next to the
+    given path as soon as it is yielded, and that file only replaces the given path once the
+    returned iterator has been exhausted. If iteration stops early (e.g. because of an error), the
+    temporary file is removed and the given path is left untouched.
+    """
+    temporary_path = f"{path}.tmp"
+    try:
+        with open(temporary_path, "w") as f:
+            f.write("[")
+            for i, vpc in enumerate(vpcs):
+                if i > 0:
+                    f.write(",")
+                f.write(json.dumps(to_vpc_data(vpc)))
+                yield vpc
+            f.write("]")
+        os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def load_topology(path: str) -> list[VPC]:
+    with open(path) as f:
+        data: list[VPCData] = json.load(f)
+    return [to_vpc(vpc) for vpc in data]
@@ -0,0 +1,117 @@
+from typing import Optional, TypedDict
+
+from aws_cidr_finder import core
+from aws_cidr_finder.custom_types import SingleCIDRVPC, SubnetUsage
+
+# AWS reserves the first four IP addresses and the last IP address of every subnet; see
+# https://docs.aws.amazon.com/vpc/latest/userguide/subnet-sizing.html
+AWS_RESERVED_IP_COUNT: int = 5
+
+UtilizationData = TypedDict(
+    "UtilizationData", {
+        "usable_ip_count": int,
+        "used_ip_count": int,
+        "available_ip_count": int,
+        "utilization": float
+    }
+)
+SubnetUtilizationData = TypedDict(
+    "SubnetUtilizationData", {
+        "id": str, "cidr": str, "utilization": UtilizationData
+    }
+)
+VPCUtilizationData = TypedDict(
+    "VPCUtilizationData",
+    {
+        "id": str,
+        "name": Optional[str],
+        "cidr": str,
+        "account": Optional[str],
+        "region": Optional[str],
+        "utilization": UtilizationData,
+        "subnets": list[SubnetUtilizationData]
+    }
+)
+
+
+class UtilizationStats:
+    __slots__ = ("usable_ip_count", "available_ip_count")
+
+    def __init__(self, *, usable_ip_count: int = 0, available_ip_count: int = 0):
+        self.usable_ip_count = usable_ip_count
+        self.available_ip_count = available_ip_count
+
+    @property
+    def used_ip_count(self) -> int:
+        return self.usable_ip_count - self.available_ip_count
+
+    @property
+    def utilization(self) -> float:
+        if self.usable_ip_count == 0:
+            return 0.0
+        return self.used_ip_count / self.usable_ip_count
+
+    def add_stats(self, other: "UtilizationStats") -> None:
+        self.usable_ip_count += other.usable_ip_count
+        self.available_ip_count += other.available_ip_count
+
+    def to_json(self) -> UtilizationData:
+        return {
+            "usable_ip_count": self.usable_ip_count,
+            "used_ip_count": self.used_ip_count,
+            "available_ip_count": self.available_ip_count,
+            "utilization": round(self.utilization, 4)
+        }
+
+    def summary(self) -> str:
+        return (
+            f"{self.used_ip_count} of {self.usable_ip_count} usable IPs used "
+            f"({self.utilization:.2%})"
+        )
+
+
+def get_subnet_utilization(subnet: SubnetUsage) -> UtilizationStats:
+    return UtilizationStats(
+        usable_ip_count=max(core.get_ip_count(subnet.cidr) - AWS_RESERVED_IP_COUNT, 0),
+        available_ip_count=subnet.available_ip_count
+    )
+
+
+def get_vpc_utilization(
+    vpc: SingleCIDRVPC
+) -> tuple[UtilizationStats, list[tuple[SubnetUsage, UtilizationStats]]]:
+    """
+    Computes the utilization of each subnet in the given VPC (most utilized first) as well as the
+    utilization of the VPC as a whole (i.e. across all of its subnets). The VPC must have been
+    retrieved with its subnet usage included.
+    """
+    vpc_stats = UtilizationStats()
+    subnet_stats: list[tuple[SubnetUsage, UtilizationStats]] = []
+    for subnet in vpc.subnet_usage or []:
+        stats = get_subnet_utilization(subnet)
+        vpc_stats.add_stats(stats)
+        subnet_stats.append((subnet, stats))
+    subnet_stats.sort(key=lambda pair: pair[1].utilization, reverse=True)
+    return vpc_stats, subnet_stats
+
+
+def convert_to_json_format(
+    vpc: SingleCIDRVPC,
+    vpc_stats: UtilizationStats,
+    subnet_stats: list[tuple[SubnetUsage, UtilizationStats]]
+) -> VPCUtilizationData:
+    # yapf: disable
+    return {
+        "id": vpc.id,
+        "name": vpc.name,
+        "cidr": vpc.cidr,
+        "account": vpc.account,
+        "region": vpc.region,
+        "utilization": vpc_stats.to_json(),
+        "subnets": [{
+            "id": subnet.id,
+            "cidr": subnet.cidr,
+            "utilization": stats.to_json()
+        } for subnet, stats in subnet_stats]
+    }
+    # yapf: enable
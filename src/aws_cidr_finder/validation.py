@@ -0,0 +1,171 @@
+import json
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, Optional, TYPE_CHECKING, TypedDict
+
+from aws_cidr_finder import core
+from aws_cidr_finder.custom_types import VPC
+
+if TYPE_CHECKING:  # pragma: no cover
+    from aws_cidr_finder.boto_wrapper import BotoWrapper
+
+CIDRProposal = TypedDict("CIDRProposal", {"vpc_id": str, "cidr": str})
+CIDRValidationData = TypedDict(
+    "CIDRValidationData",
+    {
+        "vpc_id": str,
+        "cidr": str,
+        "valid": bool,
+        "vpc_cidr": Optional[str],
+        "overlapping_subnets": list[str],
+        "overlapping_proposals": list[str],
+        "errors": list[str]
+    }
+)
+
+
+class _CIDRIndex:
+    """
+    This class indexes a list of non-overlapping CIDR blocks of the same IP version (such as the
+    CIDR blocks of a VPC, or the subnets of a VPC) by their IP ranges. Because the CIDR blocks do
+    not overlap, sorting them by their first IP also sorts them by their last IP, so lookups only
+    need binary searches.
+    """
+    def __init__(self, cidrs: Iterable[str]):
+        entries = sorted((core.get_ip_range(cidr), cidr) for cidr in cidrs)
+        self._first_ips = [first_ip for (first_ip, _), _ in entries]
+        self._last_ips = [last_ip for (_, last_ip), _ in entries]
+        self._cidrs = [cidr for _, cidr in entries]
+
+    def find_overlapping(self, ip_range: core.IPRange) -> list[str]:
+        first_ip, last_ip = ip_range
+        start = bisect_left(self._last_ips, first_ip)
+        end = bisect_right(self._first_ips, last_ip)
+        return self._cidrs[start:end]
+
+    def find_containing(self, ip_range: core.IPRange) -> Optional[str]:
+        first_ip, last_ip = ip_range
+        i = bisect_right(self._first_ips, first_ip) - 1
+        if i >= 0 and self._last_ips[i] >= last_ip:
+            return self._cidrs[i]
+        return None
+
+
+class TopologyIndex:
+    """
+    This class indexes the CIDR blocks and subnets of every VPC in a topology once, so that any
+    number of proposed CIDR blocks can each be checked in logarithmic time.
+    """
+    def __init__(self, vpcs: Iterable[VPC]):
+        self._vpc_ids: set[str] = set()
+        self._vpc_cidrs: dict[tuple[str, int], _CIDRIndex] = {}
+        self._subnets: dict[tuple[str, int], _CIDRIndex] = {}
+        for vpc in vpcs:
+            self._vpc_ids.add(vpc.id)
+            for version in [4, 6]:
+                selected_vpc = core.select_ip_version(vpc, ipv6=version == 6)
+                # A VPC may be given more than once (e.g. once per IP version), so VPCs without any
+                # CIDR blocks of an IP version must not replace the index of that IP version
+                if len(selected_vpc.cidrs) > 0:
+                    self._vpc_cidrs[vpc.id, version] = _CIDRIndex(selected_vpc.cidrs)
+                    self._subnets[vpc.id, version] = _CIDRIndex(selected_vpc.subnets)
+
+    def has_vpc(self, vpc_id: str) -> bool:
+        return vpc_id in self._vpc_ids
+
+    def find_vpc_cidr(self, vpc_id: str, cidr: str) -> Optional[str]:
+        index = self._vpc_cidrs.get((vpc_id, core.get_ip_version(cidr)))
+        return None if index is None else index.find_containing(core.get_ip_range(cidr))
+
+    def find_overlapping_subnets(self, vpc_id: str, cidr: str) -> list[str]:
+        index = self._subnets.get((vpc_id, core.get_ip_version(cidr)))
+        return [] if index is None else index.find_overlapping(core.get_ip_range(cidr))
+
+
+def _is_valid_cidr(cidr: str) -> bool:
+    try:
+        core.get_ip_range(cidr)
+        return True
+    except ValueError:
+        return False
+
+
+def _find_overlapping_proposals(proposals: list[CIDRProposal]) -> list[list[str]]:
+    # Two CIDR blocks can only overlap if one contains the other. After sorting the proposals by
+    # VPC, IP version, and first IP (largest first on ties), the proposals that overlap a given
+    # proposal are therefore exactly those left on a stack of the enclosing proposals seen so far.
+    ret: list[list[str]] = [[] for _ in proposals]
+    order: list[tuple[str, int, int, int, int]] = []
+    for i, proposal in enumerate(proposals):
+        if _is_valid_cidr(proposal["cidr"]):
+            first_ip, last_ip = core.get_ip_range(proposal["cidr"])
+            version = core.get_ip_version(proposal["cidr"])
+            order.append((proposal["vpc_id"], version, first_ip, -last_ip, i))
+    order.sort()
+
+    stack: list[tuple[str, int, int, int]] = []
+    for vpc_id, version, first_ip, negative_last_ip, i in order:
+        while len(stack) > 0 and (stack[-1][:2] != (vpc_id, version) or stack[-1][2] < first_ip):
+            stack.pop()
+        for _, _, _, j in stack:
+            ret[i].append(proposals[j]["cidr"])
+            ret[j].append(proposals[i]["cidr"])
+        stack.append((vpc_id, version, -negative_last_ip, i))
+    return ret
+
+
+def validate_proposals(proposals: list[CIDRProposal],
+                       index: TopologyIndex) -> list[CIDRValidationData]:
+    ret: list[CIDRValidationData] = []
+    for proposal, overlapping_proposals in zip(proposals, _find_overlapping_proposals(proposals)):
+        vpc_id, cidr = proposal["vpc_id"], proposal["cidr"]
+        vpc_cidr: Optional[str] = None
+        overlapping_subnets: list[str] = []
+        errors: list[str] = []
+        if not _is_valid_cidr(cidr):
+            errors.append(f"'{cidr}' is not a valid CIDR block")
+        elif not index.has_vpc(vpc_id):
+            errors.append(f"VPC '{vpc_id}' was not found")
+        else:
+            vpc_cidr = index.find_vpc_cidr(vpc_id, cidr)
+            if vpc_cidr is None:
+                errors.append(f"'{cidr}' is not inside any CIDR block of VPC '{vpc_id}'")
+            overlapping_subnets = index.find_overlapping_subnets(vpc_id, cidr)
+            if len(overlapping_subnets) > 0:
+                errors.append(
+                    f"'{cidr}' overlaps existing subnets: {', '.join(overlapping_subnets)}"
+                )
+        if len(overlapping_proposals) > 0:
+            errors.append((
+                f"'{cidr}' overlaps other proposed CIDR blocks: {', '.join(overlapping_proposals)}"
+            ))
+        ret.append({
+            "vpc_id": vpc_id,
+            "cidr": cidr,
+            "valid": len(errors) == 0,
+            "vpc_cidr": vpc_cidr,
+            "overlapping_subnets": overlapping_subnets,
+            "overlapping_proposals": overlapping_proposals,
+            "errors": errors
+        })
+    return ret
+
+
+def iter_proposal_vpcs(boto: "BotoWrapper", proposals: list[CIDRProposal]) -> Iterator[VPC]:
+    # Only the VPCs that proposals refer to are retrieved, and each IP version is only parsed if at
+    # least one proposal uses it
+    vpc_ids = sorted({proposal["vpc_id"] for proposal in proposals})
+    versions = {
+        core.get_ip_version(proposal["cidr"])
+        for proposal in proposals
+        if _is_valid_cidr(proposal["cidr"])
+    }
+    if len(versions) == 2:
+        yield from boto.iter_vpc_data(ipv6=False, vpc_ids=vpc_ids, dual_stack=True)
+    elif len(versions) == 1:
+        yield from boto.iter_vpc_data(ipv6=versions == {6}, vpc_ids=vpc_ids)
+
+
+def load_proposals(path: str) -> list[CIDRProposal]:
+    with open(path) as f:
+        proposals: list[CIDRProposal] = json.load(f)
+    return proposals
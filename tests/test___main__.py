@@ -1,12 +1,17 @@
 import json
+import pstats
+import sys
+from argparse import ArgumentTypeError
+from io import StringIO
+from pathlib import Path
+from typing import Any, Iterator
 from unittest.mock import call, MagicMock
 
 import pytest
 from pytest_mock import MockerFixture
-from tabulate import tabulate
 
 from aws_cidr_finder import __main__
-from aws_cidr_finder.custom_types import VPC
+from aws_cidr_finder.custom_types import SubnetUsage, VPC
 
 
 def test_main_no_arguments(mocker: MockerFixture) -> None:
@@ -44,7 +49,45 @@ def test_main_only_profile_argument(mocker: MockerFixture) -> None:
             "Here are the available CIDR blocks in the 'test-vpc1' VPC (VPC CIDR block "
             "'172.31.0.0/19'):"
         )),
-        call(tabulate([["172.31.16.0/20", 4096], ["Total", 4096]], headers=["CIDR", "IP Count"]))
+        call("CIDR                  IP Count"),
+        call("------------------  ----------"),
+        call("172.31.16.0/20            4096"),
+        call("Total                     4096")
+    ])
+
+
+def test_main_table_output_streams(mocker: MockerFixture) -> None:
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None)
+    print_mock: MagicMock = mocker.patch("builtins.print")
+
+    def get_vpc_data(**kwargs: Any) -> Iterator[VPC]:
+        yield VPC(id="test1", name="test-vpc1", cidrs=["172.31.0.0/19"], subnets=["172.31.0.0/20"])
+        # The first VPC's table must be printed before the next VPC has even been retrieved
+        assert call("Total                     4096") in print_mock.call_args_list
+        yield VPC(
+            id="test2", name="test-vpc2", cidrs=["172.31.32.0/20"], subnets=["172.31.32.0/21"]
+        )
+
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper._get_vpc_data", side_effect=get_vpc_data)
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["--profile", "test", "--prefix", "20"]
+    )
+
+    __main__.main()
+
+    print_mock.assert_has_calls([
+        call("172.31.16.0/20            4096"),
+        call("Total                     4096"),
+        call((
+            "Note: skipping the CIDR '172.31.40.0/21' in the VPC 'test-vpc2' because its prefix "
+            "(21) is numerically greater than the requested prefix (20)"
+        ),
+             file=sys.stderr),
+        call((
+            "Here are the available CIDR blocks in the 'test-vpc2' VPC (VPC CIDR block "
+            "'172.31.32.0/20'):"
+        ))
     ])
 
 
@@ -94,3 +137,639 @@ def test_main_json_output(mocker: MockerFixture) -> None:
         )
     ])
     # yapf: enable
+
+
+def test_main_vpc_filters(mocker: MockerFixture) -> None:
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None)
+    get_vpc_data_mock: MagicMock = mocker.patch(
+        "aws_cidr_finder.__main__.BotoWrapper._get_vpc_data", return_value=[]
+    )
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=[
+            "--profile",
+            "test",
+            "--vpc-id",
+            "vpc-1",
+            "--vpc-id",
+            "vpc-2",
+            "--tag",
+            "env=prod",
+            "--tag",
+            "team=network=core"
+        ]
+    )
+    mocker.patch("builtins.print")
+
+    __main__.main()
+
+    get_vpc_data_mock.assert_called_once_with(
+        ipv6=False,
+        vpc_ids=["vpc-1", "vpc-2"],
+        tags={
+            "env": "prod", "team": "network=core"
+        },
+        include_subnet_usage=False,
+        dual_stack=False
+    )
+
+
+def test_main_vpc_filters_duplicate_tag_key(mocker: MockerFixture) -> None:
+    mocker.patch("sys.stderr")
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["--profile", "test", "--tag", "env=a", "--tag", "env=b"]
+    )
+
+    with pytest.raises(SystemExit) as wrapped_system_exit:
+        __main__.main()
+
+    assert wrapped_system_exit.value.code == 2
+
+
+def test_parse_tag() -> None:
+    assert __main__._parse_tag("env=prod") == ("env", "prod")
+    assert __main__._parse_tag("env=") == ("env", "")
+
+    for invalid in ["env", "=prod"]:
+        with pytest.raises(ArgumentTypeError):
+            __main__._parse_tag(invalid)
+
+
+def test_parse_positive_int() -> None:
+    assert __main__._parse_positive_int("1") == 1
+    assert __main__._parse_positive_int("25") == 25
+
+    for invalid in ["0", "-1", "ten", ""]:
+        with pytest.raises(ArgumentTypeError):
+            __main__._parse_positive_int(invalid)
+    count_arguments = [
+        "--max-concurrency",
+        "--max-attempts",
+        "--top",
+        "--min-size",
+        "--profile-top",
+        "--cache-size",
+    ]
+    for argument in count_arguments:
+        with pytest.raises(SystemExit):
+            __main__._parse_arguments([argument, "0"])
+
+
+def test_parse_prefixes() -> None:
+    assert __main__._parse_prefixes("24") == [24]
+    assert __main__._parse_prefixes("24,26,28") == [24, 26, 28]
+    assert __main__._parse_prefixes("20-22,28,21") == [20, 21, 22, 28]
+
+    for invalid in ["", "twenty", "24,", "28-20", "-24", "20-22-24"]:
+        with pytest.raises(ArgumentTypeError):
+            __main__._parse_prefixes(invalid)
+
+
+def test_main_multiple_prefixes(mocker: MockerFixture) -> None:
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None)
+    mocker.patch(
+        "aws_cidr_finder.__main__.BotoWrapper._get_vpc_data",
+        return_value=[
+            VPC(id="test1", name="test-vpc1", cidrs=["172.31.0.0/19"], subnets=["172.31.0.0/21"])
+        ]
+    )
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["--profile", "test", "--prefix", "20-21", "--json"]
+    )
+    print_mock: MagicMock = mocker.patch("builtins.print")
+
+    __main__.main()
+
+    output = json.loads(print_mock.call_args.args[0])
+    assert [group["prefix"] for group in output["prefixes"]] == [20, 21]
+    assert output["prefixes"][0]["cidrs_not_converted_to_prefix"] == ["172.31.8.0/21"]
+    assert output["prefixes"][0]["data"][0]["available_cidr_blocks"] == ["172.31.16.0/20"]
+    assert output["prefixes"][1]["messages"] == []
+    assert output["prefixes"][1]["data"][0]["available_cidr_blocks"] == [
+        "172.31.8.0/21", "172.31.16.0/21", "172.31.24.0/21"
+    ]
+
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["--profile", "test", "--prefix", "20,21", "--top", "1"]
+    )
+    print_mock.reset_mock()
+
+    __main__.main()
+
+    print_mock.assert_has_calls([
+        call((
+            "Note: skipping the CIDR '172.31.8.0/21' in the VPC 'test-vpc1' because its prefix (21) "
+            "is numerically greater than the requested prefix (20)"
+        ),
+             file=sys.stderr),
+        call(
+            "Here are the available CIDR blocks with a prefix of 20 in the 'test-vpc1' VPC (VPC "
+            "CIDR block '172.31.0.0/19'):"
+        ),
+        call("CIDR                  IP Count"),
+        call("------------------  ----------"),
+        call("172.31.16.0/20            4096"),
+        call("Total                     4096"),
+        call(
+            "Here are the available CIDR blocks with a prefix of 21 in the 'test-vpc1' VPC (VPC "
+            "CIDR block '172.31.0.0/19'):"
+        ),
+        call("CIDR                  IP Count"),
+        call("------------------  ----------"),
+        call("172.31.8.0/21             2048"),
+        call("Total                     2048")
+    ])
+
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["--profile", "test", "--prefix", "20,21", "--format", "csv"]
+    )
+    stdout_mock: StringIO = mocker.patch("aws_cidr_finder.__main__.sys.stdout", new=StringIO())
+
+    __main__.main()
+
+    assert stdout_mock.getvalue().splitlines()[1:] == [
+        ",,test1,172.31.0.0/19,172.31.16.0/20,20,4096",
+        ",,test1,172.31.0.0/19,172.31.8.0/21,21,2048",
+        ",,test1,172.31.0.0/19,172.31.16.0/21,21,2048",
+        ",,test1,172.31.0.0/19,172.31.24.0/21,21,2048"
+    ]
+
+
+def test_main_metrics(mocker: MockerFixture) -> None:
+    boto_init_mock: MagicMock = mocker.patch(
+        "aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None
+    )
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper._get_vpc_data", return_value=[])
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=[
+            "--profile", "test", "--metrics", "--max-concurrency", "4", "--read-timeout", "5"
+        ]
+    )
+    print_mock: MagicMock = mocker.patch("builtins.print")
+
+    __main__.main()
+
+    assert boto_init_mock.call_args.kwargs["max_concurrency"] == 4
+    assert boto_init_mock.call_args.kwargs["max_attempts"] is None
+    assert boto_init_mock.call_args.kwargs["read_timeout"] == 5
+    print_mock.assert_called_with(
+        "Metrics: api calls: 0, retries: 0, throttles: 0, cache hits: 0, cache misses: 0",
+        file=sys.stderr
+    )
+
+
+def test_main_profile_output(mocker: MockerFixture, tmp_path: Path) -> None:
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None)
+    mocker.patch(
+        "aws_cidr_finder.__main__.BotoWrapper._get_vpc_data",
+        return_value=[
+            VPC(id="test1", name="test-vpc1", cidrs=["172.31.0.0/16"], subnets=["172.31.64.0/20"])
+        ]
+    )
+    path = tmp_path / "profile.prof"
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=[
+            "--profile", "test", "--json", "--profile-output", str(path), "--profile-top", "5"
+        ]
+    )
+    print_mock: MagicMock = mocker.patch("builtins.print")
+
+    __main__.main()
+
+    functions = {function for _, _, function in pstats.Stats(str(path)).stats}  # type: ignore
+    assert "iter_vpc_data" in functions
+    assert "find_subnet_holes" in functions
+    # Writing the output is not part of the profiled phases
+    assert "convert_to_json_format" not in functions
+    # pstats writes the top functions to STDERR using print
+    assert any(
+        "function calls" in c.args and c.kwargs.get("file") is sys.stderr
+        for c in print_mock.call_args_list
+    )
+
+
+def test_main_top_and_min_size(mocker: MockerFixture) -> None:
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None)
+    mocker.patch(
+        "aws_cidr_finder.__main__.BotoWrapper._get_vpc_data",
+        return_value=[
+            VPC(id="test1", name="test-vpc1", cidrs=["172.31.0.0/16"], subnets=["172.31.64.0/20"])
+        ]
+    )
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["--profile", "test", "--top", "2", "--min-size", "16384"]
+    )
+    print_mock: MagicMock = mocker.patch("builtins.print")
+
+    __main__.main()
+
+    print_mock.assert_has_calls([
+        call("CIDR                  IP Count"),
+        call("------------------  ----------"),
+        call("172.31.128.0/17          32768"),
+        call("172.31.0.0/18            16384"),
+        call("Total                    49152")
+    ])
+
+
+def test_main_bitmap_backend(mocker: MockerFixture) -> None:
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None)
+    mocker.patch(
+        "aws_cidr_finder.__main__.BotoWrapper._get_vpc_data",
+        return_value=[
+            VPC(id="test1", name="test-vpc1", cidrs=["172.31.0.0/16"], subnets=["172.31.64.0/20"])
+        ]
+    )
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["--profile", "test", "--backend", "bitmap", "--json"]
+    )
+    print_mock: MagicMock = mocker.patch("builtins.print")
+
+    __main__.main()
+
+    output = json.loads(print_mock.call_args.args[0])
+    assert output["data"][0]["available_cidr_blocks"] == [
+        "172.31.0.0/18", "172.31.80.0/20", "172.31.96.0/19", "172.31.128.0/17"
+    ]
+
+
+def test_main_csv_output(mocker: MockerFixture) -> None:
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None)
+    mocker.patch(
+        "aws_cidr_finder.__main__.BotoWrapper._get_vpc_data",
+        return_value=[
+            VPC(
+                id="test1",
+                name="test-vpc1",
+                cidrs=["172.31.0.0/19"],
+                subnets=["172.31.0.0/21"],
+                account="123456789012",
+                region="us-east-1"
+            )
+        ]
+    )
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["--profile", "test", "--format", "csv", "--prefix", "20"]
+    )
+    print_mock: MagicMock = mocker.patch("builtins.print")
+    stdout_mock: StringIO = mocker.patch("aws_cidr_finder.__main__.sys.stdout", new=StringIO())
+
+    __main__.main()
+
+    expected_message = (
+        "Note: skipping the CIDR '172.31.8.0/21' in the VPC 'test-vpc1' because its prefix (21) is "
+        "numerically greater than the requested prefix (20)"
+    )
+    print_mock.assert_called_once_with(expected_message, file=sys.stderr)
+    assert stdout_mock.getvalue().splitlines() == [
+        "account,region,vpc_id,vpc_cidr,free_cidr,prefix,ip_count",
+        "123456789012,us-east-1,test1,172.31.0.0/19,172.31.16.0/20,20,4096"
+    ]
+
+
+def test_main_columnar_output_requires_output_file(mocker: MockerFixture) -> None:
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["--profile", "test", "--format", "parquet"]
+    )
+    mocker.patch("sys.stderr")
+
+    with pytest.raises(SystemExit) as wrapped_system_exit:
+        __main__.main()
+
+    assert wrapped_system_exit.value.code == 2
+
+
+def test_main_report(mocker: MockerFixture) -> None:
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None)
+    mocker.patch(
+        "aws_cidr_finder.__main__.BotoWrapper._get_vpc_data",
+        return_value=[
+            VPC(
+                id="test1",
+                name="test-vpc1",
+                cidrs=["172.31.0.0/19"],
+                subnets=["172.31.0.0/20"],
+                account="123456789012",
+                region="us-east-1"
+            )
+        ]
+    )
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["--profile", "test", "--report", "--prefix", "24"]
+    )
+    print_mock: MagicMock = mocker.patch("builtins.print")
+
+    __main__.main()
+
+    summary = (
+        "8192 total IPs, 4096 used, 4096 free (largest free block: 4096 IPs, largest free "
+        "fragment: 4096 IPs, free fragments: 1, fragmentation index: 0.0000)"
+    )
+    print_mock.assert_has_calls([
+        call(f"Capacity of the 'test-vpc1' VPC (VPC CIDR block '172.31.0.0/19'): {summary}"),
+        call(f"Capacity of account '123456789012' in region 'us-east-1': {summary}"),
+        call(f"Capacity of all VPCs: {summary}")
+    ])
+
+
+def test_main_utilization(mocker: MockerFixture) -> None:
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None)
+    get_vpc_data_mock: MagicMock = mocker.patch(
+        "aws_cidr_finder.__main__.BotoWrapper._get_vpc_data",
+        return_value=[
+            VPC(
+                id="test1",
+                name="test-vpc1",
+                cidrs=["172.31.0.0/19"],
+                subnets=["172.31.0.0/20"],
+                subnet_usage=[
+                    SubnetUsage(id="subnet-1", cidr="172.31.0.0/20", available_ip_count=4000)
+                ]
+            )
+        ]
+    )
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["--profile", "test", "--utilization"]
+    )
+    print_mock: MagicMock = mocker.patch("builtins.print")
+
+    __main__.main()
+
+    assert get_vpc_data_mock.call_args.kwargs["include_subnet_usage"]
+    print_mock.assert_has_calls([
+        call((
+            "Utilization of the 'test-vpc1' VPC (VPC CIDR block '172.31.0.0/19'): 91 of 4091 "
+            "usable IPs used (2.22%)"
+        )),
+        call("  subnet-1 (172.31.0.0/20): 91 of 4091 usable IPs used (2.22%)")
+    ])
+
+
+def test_main_utilization_ipv6(mocker: MockerFixture) -> None:
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["--profile", "test", "--utilization", "--ipv6"]
+    )
+    mocker.patch("sys.stderr")
+
+    with pytest.raises(SystemExit) as wrapped_system_exit:
+        __main__.main()
+
+    assert wrapped_system_exit.value.code == 2
+
+
+def test_main_save_topology_and_diff(mocker: MockerFixture, tmp_path: Path) -> None:
+    old_path = str(tmp_path / "old.json")
+    new_path = str(tmp_path / "new.json")
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None)
+    mocker.patch(
+        "aws_cidr_finder.__main__.BotoWrapper._get_vpc_data",
+        side_effect=[[
+            VPC(id="test1", name="test-vpc1", cidrs=["172.31.0.0/19"], subnets=["172.31.0.0/20"])
+        ],
+                     [
+                         VPC(
+                             id="test1",
+                             name="test-vpc1",
+                             cidrs=["172.31.0.0/19"],
+                             subnets=["172.31.0.0/21", "172.31.16.0/24"]
+                         )
+                     ]]
+    )
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        side_effect=[["--profile", "test", "--save-topology",
+                      old_path], ["--profile", "test", "--save-topology", new_path],
+                     ["diff", old_path, new_path]]
+    )
+    print_mock: MagicMock = mocker.patch("builtins.print")
+
+    __main__.main()
+    __main__.main()
+    print_mock.reset_mock()
+    __main__.main()
+
+    print_mock.assert_has_calls([
+        call((
+            "Changes to the available CIDR blocks in the 'test-vpc1' VPC (VPC CIDR block "
+            "'172.31.0.0/19', changed):"
+        )),
+        call("Freed:"),
+        call("CIDR                  IP Count"),
+        call("------------------  ----------"),
+        call("172.31.8.0/21             2048"),
+        call("Total                     2048"),
+        call("Consumed:"),
+        call("CIDR                  IP Count"),
+        call("------------------  ----------"),
+        call("172.31.16.0/24             256"),
+        call("Total                      256")
+    ])
+
+
+def test_main_diff_json_without_changes(mocker: MockerFixture, tmp_path: Path) -> None:
+    path = tmp_path / "topology.json"
+    path.write_text(
+        json.dumps([{
+            "id": "test1", "name": None, "cidrs": ["172.31.0.0/19"], "subnets": []
+        }])
+    )
+    print_mock: MagicMock = mocker.patch("builtins.print")
+
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["--json", "diff", str(path), str(path)]
+    )
+    __main__.main()
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["diff", str(path), str(path), "--ipv6"]
+    )
+    __main__.main()
+
+    print_mock.assert_has_calls([
+        call(json.dumps({"data": []})),
+        call("No changes to the available IPv6 CIDR blocks were found.")
+    ])
+
+
+def test_main_check(mocker: MockerFixture, tmp_path: Path) -> None:
+    proposals_path = tmp_path / "proposals.json"
+    proposals_path.write_text(
+        json.dumps([{
+            "vpc_id": "test1", "cidr": "172.31.16.0/20"
+        }, {
+            "vpc_id": "test1", "cidr": "172.31.8.0/21"
+        }, {
+            "vpc_id": "test1", "cidr": "2600:1f18::/64"
+        }])
+    )
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None)
+    get_vpc_data_mock: MagicMock = mocker.patch(
+        "aws_cidr_finder.__main__.BotoWrapper._get_vpc_data",
+        return_value=[
+            VPC(
+                id="test1",
+                name=None,
+                cidrs=["172.31.0.0/19", "2600:1f18::/56"],
+                subnets=["172.31.0.0/20"]
+            )
+        ]
+    )
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["--profile", "test", "check", str(proposals_path)]
+    )
+    print_mock: MagicMock = mocker.patch("builtins.print")
+
+    with pytest.raises(SystemExit) as wrapped_system_exit:
+        __main__.main()
+
+    assert wrapped_system_exit.value.code == 1
+    # Both IP versions are parsed from a single retrieval of the VPCs
+    get_vpc_data_mock.assert_called_once_with(
+        ipv6=False, vpc_ids=["test1"], tags=None, include_subnet_usage=False, dual_stack=True
+    )
+    print_mock.assert_has_calls([
+        call((
+            "Invalid proposal for VPC 'test1': '172.31.8.0/21' overlaps existing subnets: "
+            "172.31.0.0/20"
+        )),
+        call("2 of 3 proposed CIDR blocks are valid.")
+    ])
+
+
+def test_main_check_topology(mocker: MockerFixture, tmp_path: Path) -> None:
+    proposals_path = tmp_path / "proposals.json"
+    proposals_path.write_text(json.dumps([{"vpc_id": "test1", "cidr": "172.31.16.0/20"}]))
+    topology_path = tmp_path / "topology.json"
+    topology_path.write_text(
+        json.dumps([{
+            "id": "test1", "name": None, "cidrs": ["172.31.0.0/19"], "subnets": ["172.31.0.0/20"]
+        }])
+    )
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["check", str(proposals_path), "--topology", str(topology_path), "--json"]
+    )
+    print_mock: MagicMock = mocker.patch("builtins.print")
+
+    __main__.main()
+
+    print_mock.assert_called_once_with(
+        json.dumps({
+            "data": [{
+                "vpc_id": "test1",
+                "cidr": "172.31.16.0/20",
+                "valid": True,
+                "vpc_cidr": "172.31.0.0/19",
+                "overlapping_subnets": [],
+                "overlapping_proposals": [],
+                "errors": []
+            }]
+        })
+    )
+
+
+def test_main_cache(mocker: MockerFixture, tmp_path: Path) -> None:
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None)
+    mocker.patch(
+        "aws_cidr_finder.__main__.BotoWrapper._get_vpc_data",
+        return_value=[
+            VPC(id="test1", name="test-vpc1", cidrs=["172.31.0.0/19"], subnets=["172.31.0.0/20"])
+        ]
+    )
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["--profile", "test", "--metrics", "--json", "--cache", str(tmp_path / "db")]
+    )
+    print_mock: MagicMock = mocker.patch("builtins.print")
+
+    __main__.main()
+    __main__.main()
+
+    assert print_mock.call_args_list[1] == call(
+        "Metrics: api calls: 0, retries: 0, throttles: 0, cache hits: 0, cache misses: 1",
+        file=sys.stderr
+    )
+    assert print_mock.call_args_list[3] == call(
+        "Metrics: api calls: 0, retries: 0, throttles: 0, cache hits: 1, cache misses: 0",
+        file=sys.stderr
+    )
+    assert print_mock.call_args_list[0] == print_mock.call_args_list[2]
+
+
+def test_main_dual_stack(mocker: MockerFixture) -> None:
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None)
+    get_vpc_data_mock: MagicMock = mocker.patch(
+        "aws_cidr_finder.__main__.BotoWrapper._get_vpc_data",
+        return_value=[
+            VPC(
+                id="test1",
+                name="test-vpc1",
+                cidrs=["172.31.0.0/19", "2600:1f18::/63"],
+                subnets=["172.31.0.0/20", "2600:1f18::/64"]
+            )
+        ]
+    )
+    mocker.patch(
+        "aws_cidr_finder.__main__._get_arguments",
+        return_value=["--profile", "test", "--dual-stack", "--json"]
+    )
+    print_mock: MagicMock = mocker.patch("builtins.print")
+
+    __main__.main()
+
+    assert get_vpc_data_mock.call_args.kwargs["dual_stack"]
+    output = json.loads(print_mock.call_args.args[0])
+    assert [(vpc["cidr"], vpc["available_cidr_blocks"])
+            for vpc in output["data"]] == [("172.31.0.0/19", ["172.31.16.0/20"]),
+                                           ("2600:1f18::/63", ["2600:1f18:0:1::/64"])]
+
+
+def test_main_invalid_output_combinations(mocker: MockerFixture) -> None:
+    mocker.patch("sys.stderr")
+    invalid_combinations = [
+        ["--json", "--format", "csv"],
+        ["--json", "--format", "parquet", "--output", "out.parquet"],
+        ["--json", "--output", "out.json"],
+        ["--format", "json", "--output", "out.json"],
+        ["--output", "out.txt"],
+    ]
+    for arguments in invalid_combinations:
+        mocker.patch(
+            "aws_cidr_finder.__main__._get_arguments",
+            return_value=["--profile", "test", *arguments]
+        )
+
+        with pytest.raises(SystemExit) as wrapped_system_exit:
+            __main__.main()
+
+        assert wrapped_system_exit.value.code == 2
+
+
+def test_main_dual_stack_invalid_combinations(mocker: MockerFixture) -> None:
+    mocker.patch("sys.stderr")
+    for arguments in [["--ipv6"], ["--prefix", "24"], ["--prefix", "20-28"], ["--report"],
+                      ["--utilization"]]:
+        mocker.patch(
+            "aws_cidr_finder.__main__._get_arguments",
+            return_value=["--profile", "test", "--dual-stack", *arguments]
+        )
+
+        with pytest.raises(SystemExit) as wrapped_system_exit:
+            __main__.main()
+
+        assert wrapped_system_exit.value.code == 2
@@ -0,0 +1,58 @@
+from ipaddress import ip_address
+
+import pytest
+
+from aws_cidr_finder.bitmap import build_bitmap, OccupancyBitmap
+
+
+def test_occupancy_bitmap_free_blocks() -> None:
+    bitmap = OccupancyBitmap(vpc_cidr="10.0.0.0/24", granularity=26)
+    bitmap.add_subnet("10.0.0.64/26")
+
+    assert bitmap.size == 4
+    assert list(bitmap.iter_free_blocks(25)) == ["10.0.0.128/25"]
+    assert list(bitmap.iter_free_blocks(26)) == ["10.0.0.0/26", "10.0.0.128/26", "10.0.0.192/26"]
+    assert list(bitmap.iter_free_blocks(27))[:3] == ["10.0.0.0/27", "10.0.0.32/27", "10.0.0.128/27"]
+    assert list(bitmap.iter_free_blocks(24)) == []
+    assert list(bitmap.iter_free_blocks(16)) == []
+    counts = [bitmap.count_free_blocks(prefix) for prefix in [16, 24, 25, 26, 27, 33]]
+    assert counts == [0, 0, 1, 3, 6, 0]
+
+
+def test_occupancy_bitmap_updates() -> None:
+    bitmap = OccupancyBitmap(vpc_cidr="2600:1f18:0:ab00::/56", granularity=64)
+
+    assert bitmap.allocate(57) == "2600:1f18:0:ab00::/57"
+    assert bitmap.allocate(64) == "2600:1f18:0:ab80::/64"
+    assert not bitmap.is_free("2600:1f18:0:ab80::/64")
+    assert bitmap.allocate(57) is None
+    assert bitmap.allocate(48) is None
+
+    bitmap.remove_subnet("2600:1f18:0:ab00::/57")
+    assert bitmap.is_free("2600:1f18:0:ab00::/57")
+    assert bitmap.allocate(57) == "2600:1f18:0:ab00::/57"
+
+    # Subnets that are already occupied are left as they are
+    bitmap.add_subnets(["2600:1f18:0:ab00::/58", "2600:1f18:0:abff::/64"])
+    assert bitmap.count_free_blocks(64) == 126
+
+    with pytest.raises(ValueError):
+        bitmap.allocate(65)
+    with pytest.raises(ValueError):
+        bitmap.add_subnet("2600:1f18:0:ab00::/65")
+    with pytest.raises(ValueError):
+        bitmap.add_subnet("10.0.0.0/24")
+    with pytest.raises(ValueError):
+        OccupancyBitmap(vpc_cidr="10.0.0.0/24", granularity=16)
+
+
+def test_occupancy_bitmap_free_ip_ranges() -> None:
+    bitmap = build_bitmap("10.0.0.0/24", ["10.0.0.0/26", "10.0.0.128/28"])
+
+    assert bitmap is not None
+    assert bitmap.granularity == 28
+    assert bitmap.get_free_ip_ranges() == [
+        (int(ip_address("10.0.0.64")), int(ip_address("10.0.0.127"))),
+        (int(ip_address("10.0.0.144")), int(ip_address("10.0.0.255")))
+    ]
+    assert build_bitmap("2600:1f18::/56", ["2600:1f18::/128"]) is None
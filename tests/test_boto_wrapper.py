@@ -1,6 +1,14 @@
-from typing import Any
+from typing import Any, Iterator
+from unittest.mock import MagicMock
+
+import boto3
+import pytest
+from botocore.awsrequest import AWSPreparedRequest, AWSResponse
+from botocore.exceptions import ClientError
+from pytest_mock import MockerFixture
 
 from aws_cidr_finder import boto_wrapper
+from aws_cidr_finder.metrics import Metrics
 
 
 def _assert_lists_equal(actual: list[Any], expected: list[Any]) -> None:
@@ -33,6 +41,8 @@ def test_parse_vpc_cidrs_ipv4() -> None:
     }
     # yapf: enable
     _assert_lists_equal(boto_wrapper._parse_vpc_cidrs(json, ipv6=False), ["172.0.0.0/16"])
+    # VPCs without IPv6 CIDR blocks do not necessarily include the IPv6 association set
+    assert boto_wrapper._parse_vpc_cidrs(json, ipv6=True) == []
 
 
 def test_parse_vpc_cidrs_ipv6() -> None:
@@ -55,3 +65,169 @@ def test_parse_vpc_cidrs_ipv6() -> None:
     }
     # yapf: enable
     _assert_lists_equal(boto_wrapper._parse_vpc_cidrs(json, ipv6=True), ["::/96"])
+
+
+def test_build_vpc_filters() -> None:
+    assert boto_wrapper._build_vpc_filters(vpc_ids=None, tags=None) == []
+    assert boto_wrapper._build_vpc_filters(vpc_ids=[], tags={}) == []
+    # yapf: disable
+    assert boto_wrapper._build_vpc_filters(
+        vpc_ids=["vpc-1", "vpc-2"],
+        tags={"env": "prod", "team": "network"}
+    ) == [
+        {"Name": "vpc-id", "Values": ["vpc-1", "vpc-2"]},
+        {"Name": "tag:env", "Values": ["prod"]},
+        {"Name": "tag:team", "Values": ["network"]}
+    ]
+    # yapf: enable
+
+
+def test_build_client_config() -> None:
+    config = boto_wrapper._build_client_config(
+        max_concurrency=25, max_attempts=None, connect_timeout=None, read_timeout=None
+    )
+    assert config.retries == {"mode": "adaptive"}
+    assert config.max_pool_connections == 25
+    assert config.connect_timeout == 60  # Boto's default
+    assert config.read_timeout == 60  # Boto's default
+
+    config = boto_wrapper._build_client_config(
+        max_concurrency=5, max_attempts=8, connect_timeout=2.5, read_timeout=30
+    )
+    assert config.retries == {"mode": "adaptive", "total_max_attempts": 8}
+    assert config.max_pool_connections == 5
+    assert config.connect_timeout == 2.5
+    assert config.read_timeout == 30
+
+
+def test_boto_wrapper_rejects_invalid_max_concurrency() -> None:
+    for max_concurrency in [0, -1]:
+        with pytest.raises(ValueError):
+            boto_wrapper.BotoWrapper(
+                profile_name=None, region=None, max_concurrency=max_concurrency
+            )
+
+
+def test_get_vpc_data_stops_early(mocker: MockerFixture) -> None:
+    mocker.patch("aws_cidr_finder.boto_wrapper.BotoWrapper.__init__", return_value=None)
+    wrapper = boto_wrapper.BotoWrapper(profile_name=None, region=None)
+    wrapper._max_concurrency = 2
+    wrapper._client = MagicMock()
+    wrapper._client.describe_vpcs.return_value = {
+        "Vpcs": [{
+            "VpcId": f"vpc-{i}",
+            "CidrBlockAssociationSet": [{
+                "CidrBlock": f"10.{i}.0.0/16", "CidrBlockState": {
+                    "State": "associated"
+                }
+            }]
+        } for i in range(100)]
+    }
+    wrapper._client.describe_subnets.side_effect = lambda Filters: {
+        "Subnets": [{
+            "CidrBlock": Filters[0]["Values"][0].replace("vpc-", "10.") + ".0.0/24"
+        }]
+    }
+
+    vpcs = wrapper.iter_vpc_data(ipv6=False)
+    first = next(vpcs)
+    vpcs.close()  # type: ignore[attr-defined]
+
+    assert (first.id, first.cidrs, first.subnets) == ("vpc-0", ["10.0.0.0/16"], ["10.0.0.0/24"])
+    # Only the calls in flight (at most max_concurrency) plus the one submitted when the first VPC
+    # was yielded are ever made, rather than one for every VPC
+    assert wrapper._client.describe_subnets.call_count <= 3
+
+    vpcs = wrapper.iter_vpc_data(ipv6=False)
+    assert [vpc.id for vpc in vpcs] == [f"vpc-{i}" for i in range(100)]
+
+
+def test_metrics_handlers() -> None:
+    metrics = Metrics()
+
+    throttled_response = (MagicMock(), {"Error": {"Code": "RequestLimitExceeded"}})
+    boto_wrapper._record_throttle(metrics, response=throttled_response, attempts=1)
+    boto_wrapper._record_throttle(metrics, response=(MagicMock(), {}), attempts=2)
+    boto_wrapper._record_throttle(metrics, response=None, caught_exception=Exception())
+    assert metrics.throttles == 1
+
+    boto_wrapper._record_api_call(metrics, parsed={"ResponseMetadata": {"RetryAttempts": 1}})
+    boto_wrapper._record_failed_api_call(
+        metrics,
+        exception=ClientError({
+            "Error": {
+                "Code": "RequestLimitExceeded"
+            }, "ResponseMetadata": {
+                "RetryAttempts": 4
+            }
+        },
+                              "DescribeVpcs")
+    )
+    boto_wrapper._record_failed_api_call(metrics, exception=Exception())
+    assert metrics.api_calls == 3
+    assert metrics.retries == 5
+
+
+def test_register_metrics_handlers() -> None:
+    client = MagicMock()
+    boto_wrapper._register_metrics_handlers(client, Metrics())
+    client.meta.events.register_first.assert_called_once()
+    assert client.meta.events.register.call_count == 2
+
+
+class _FakeRawResponse:
+    def __init__(self, body: bytes):
+        self._body = body
+
+    def stream(self, **kwargs: Any) -> Iterator[bytes]:
+        yield self._body
+
+
+def test_metrics_handlers_with_client(mocker: MockerFixture) -> None:
+    # Retries are not delayed, since the responses below do not come from AWS
+    mocker.patch("time.sleep")
+    mocker.patch("botocore.retries.bucket.TokenBucket.acquire", return_value=True)
+    client = boto3.session.Session(
+        aws_access_key_id="test", aws_secret_access_key="test", region_name="us-east-1"
+    ).client(
+        "ec2",
+        config=boto_wrapper._build_client_config(
+            max_concurrency=1, max_attempts=5, connect_timeout=None, read_timeout=None
+        )
+    )
+    metrics = Metrics()
+    boto_wrapper._register_metrics_handlers(client, metrics)
+
+    throttled = (
+        b"<Response><Errors><Error><Code>RequestLimitExceeded</Code><Message>Rate exceeded"
+        b"</Message></Error></Errors><RequestID>1</RequestID></Response>"
+    )
+    succeeded = (
+        b'<DescribeVpcsResponse xmlns="http://ec2.amazonaws.com/doc/2016-11-15/">'
+        b"<requestId>1</requestId><vpcSet/></DescribeVpcsResponse>"
+    )
+    responses = [(503, throttled), (503, throttled), (200, succeeded)]
+
+    def send(request: AWSPreparedRequest, **kwargs: Any) -> AWSResponse:
+        # Returning a response from this event prevents Boto from sending the request
+        status_code, body = responses.pop(0)
+        return AWSResponse(request.url, status_code, {}, _FakeRawResponse(body))
+
+    client.meta.events.register("before-send.ec2", send)
+
+    assert client.describe_vpcs()["Vpcs"] == []
+    assert (metrics.api_calls, metrics.retries, metrics.throttles) == (1, 2, 2)
+
+
+def test_parse_subnet_usage() -> None:
+    # yapf: disable
+    subnets = [
+        {"SubnetId": "subnet-1", "CidrBlock": "10.0.0.0/24", "AvailableIpAddressCount": 200},
+        {"SubnetId": "subnet-2", "Ipv6CidrBlockAssociationSet": []}
+    ]
+    # yapf: enable
+    usage = boto_wrapper._parse_subnet_usage(subnets)  # type: ignore
+
+    assert len(usage) == 1
+    assert (usage[0].id, usage[0].cidr,
+            usage[0].available_ip_count) == ("subnet-1", "10.0.0.0/24", 200)
@@ -0,0 +1,77 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from aws_cidr_finder.cache import COMMIT_INTERVAL, get_cache_key, ResultCache
+from aws_cidr_finder.metrics import Metrics
+
+
+def test_get_cache_key() -> None:
+    key = get_cache_key("10.0.0.0/16", ["10.0.1.0/24", "10.0.0.0/24"], ipv6=False, prefix=None)
+
+    assert key == get_cache_key(
+        "10.0.0.0/16", ["10.0.0.0/24", "10.0.1.0/24"], ipv6=False, prefix=None
+    )
+    assert key != get_cache_key("10.0.0.0/16", ["10.0.0.0/24"], ipv6=False, prefix=None)
+    assert key != get_cache_key(
+        "10.0.0.0/16", ["10.0.0.0/24", "10.0.1.0/24"], ipv6=False, prefix=24
+    )
+
+
+def test_result_cache_in_memory() -> None:
+    metrics = Metrics()
+    cache = ResultCache(max_memory_entries=2, metrics=metrics)
+
+    cache.put("a", (["10.0.0.0/24"], []))
+    cache.put("b", (["10.0.1.0/24"], []))
+    result = cache.get("a")
+    assert result == (["10.0.0.0/24"], [])
+    # Modifying a returned result must not modify the cached result
+    result[0].append("10.0.2.0/24")
+    cache.put("c", (["10.0.2.0/24"], []))
+
+    assert cache.get("a") == (["10.0.0.0/24"], [])
+    assert cache.get("b") is None  # Evicted, since it was the least recently used
+    assert cache.get("c") == (["10.0.2.0/24"], [])
+    assert (metrics.cache_hits, metrics.cache_misses) == (3, 1)
+    cache.close()
+
+
+def test_result_cache_on_disk(tmp_path: Path) -> None:
+    path = str(tmp_path / "cache.db")
+
+    with ResultCache(path=path, max_entries=2) as cache:
+        cache.put("a", (["10.0.0.0/24"], ["10.0.1.0/28"]))
+        cache.put("b", (["10.0.1.0/24"], []))
+        cache.put("c", (["10.0.2.0/24"], []))
+        assert cache.get("a") is not None
+
+    with ResultCache(path=path, max_entries=2, max_memory_entries=1) as cache:
+        assert cache.get("a") == (["10.0.0.0/24"], ["10.0.1.0/28"])
+        assert cache.get("b") is None  # Evicted, since it was the least recently used
+        assert cache.get("c") == (["10.0.2.0/24"], [])
+        assert cache.get("a") == (["10.0.0.0/24"], ["10.0.1.0/28"])
+
+
+def test_result_cache_commits_periodically(tmp_path: Path) -> None:
+    path = str(tmp_path / "cache.db")
+    cache = ResultCache(path=path, max_entries=2)
+
+    for i in range(COMMIT_INTERVAL):
+        cache.put(str(i), ([f"10.0.{i}.0/24"], []))
+
+    # The writes are visible to (and trimmed for) other connections without closing the cache first
+    connection = sqlite3.connect(path)
+    rows = connection.execute("SELECT key FROM results ORDER BY key").fetchall()
+    connection.close()
+    assert rows == [(str(COMMIT_INTERVAL - 2), ), (str(COMMIT_INTERVAL - 1), )]
+    cache.close()
+
+
+def test_result_cache_rejects_invalid_sizes(tmp_path: Path) -> None:
+    for size in [0, -1]:
+        with pytest.raises(ValueError):
+            ResultCache(path=str(tmp_path / "cache.db"), max_entries=size)
+        with pytest.raises(ValueError):
+            ResultCache(max_memory_entries=size)
@@ -1,6 +1,11 @@
 from typing import Any
 
+import pytest
+
 from aws_cidr_finder import core
+from aws_cidr_finder.cache import ResultCache
+from aws_cidr_finder.custom_types import SubnetUsage, VPC
+from aws_cidr_finder.metrics import Metrics
 
 
 def _assert_lists_equal(actual: list[Any], expected: list[Any]) -> None:
@@ -13,3 +18,176 @@ def test_get_prefix() -> None:
     assert core.get_prefix("172.0.0.2/31") == 31
     assert core.get_prefix("172.0.16.0/20") == 20
     assert core.get_prefix("0.0.0.0/0") == 0
+
+
+def test_select_cidrs() -> None:
+    cidrs = ["172.31.16.1/32", "172.31.16.2/31", "172.31.96.0/19", "172.31.128.0/17"]
+
+    assert core.select_cidrs(cidrs, top=None, min_size=None) == cidrs
+    assert core.select_cidrs(cidrs, top=None, min_size=2) == cidrs[1:]
+    assert core.select_cidrs(cidrs, top=2, min_size=None) == ["172.31.128.0/17", "172.31.96.0/19"]
+    assert core.select_cidrs(cidrs, top=10, min_size=8192) == ["172.31.128.0/17", "172.31.96.0/19"]
+
+    for top in [0, -1]:
+        with pytest.raises(ValueError):
+            core.select_cidrs(cidrs, top=top, min_size=None)
+
+
+def test_get_ip_range() -> None:
+    assert core.get_ip_range("0.0.0.0/0") == (0, 2**32 - 1)
+    assert core.get_ip_range("0.0.0.16/28") == (16, 31)
+    assert core.get_ip_range("::1/128") == (1, 1)
+
+
+def test_split_out_individual_cidrs_with_subnet_usage() -> None:
+    usage = [
+        SubnetUsage(id="subnet-1", cidr="10.0.0.0/24", available_ip_count=1),
+        SubnetUsage(id="subnet-2", cidr="10.1.0.0/24", available_ip_count=2)
+    ]
+    vpc = VPC(
+        id="vpc-1",
+        name=None,
+        cidrs=["10.0.0.0/16", "10.1.0.0/16"],
+        subnets=["10.0.0.0/24", "10.1.0.0/24"],
+        subnet_usage=usage
+    )
+
+    first, second = core.split_out_individual_cidrs([vpc])
+
+    assert first.subnet_usage == [usage[0]]
+    assert second.subnet_usage == [usage[1]]
+    assert core.split_out_individual_cidrs([core.select_ip_version(vpc, ipv6=True)]) == []
+    assert core.select_ip_version(vpc, ipv6=True).subnet_usage == []
+
+
+def test_merge_ip_ranges() -> None:
+    assert core.merge_ip_ranges([]) == []
+
+    ranges = [(10, 20), (0, 4), (5, 7), (15, 30), (40, 50)]
+    assert core.merge_ip_ranges(ranges) == [(0, 7), (10, 30), (40, 50)]
+
+
+def test_subtract_ip_ranges() -> None:
+    assert core.subtract_ip_ranges([(0, 99)], []) == [(0, 99)]
+    assert core.subtract_ip_ranges([], [(0, 99)]) == []
+    assert core.subtract_ip_ranges([(0, 99)], [(0, 99)]) == []
+
+    ranges = [(0, 9), (20, 29), (40, 49)]
+    ranges_to_remove = [(5, 22), (25, 25), (45, 60)]
+    expected = [(0, 4), (23, 24), (26, 29), (40, 44)]
+    assert core.subtract_ip_ranges(ranges, ranges_to_remove) == expected
+
+
+def test_get_free_ip_ranges() -> None:
+    assert core.get_free_ip_ranges("10.0.0.0/24", []) == [core.get_ip_range("10.0.0.0/24")]
+    assert core.get_free_ip_ranges("10.0.0.0/24", ["10.0.0.0/26", "10.0.0.128/25"]) == [
+        core.get_ip_range("10.0.0.64/26")
+    ]
+
+
+def test_convert_ip_ranges_to_cidrs() -> None:
+    first_ip, _ = core.get_ip_range("10.0.0.1/32")
+    _, last_ip = core.get_ip_range("10.0.0.8/30")
+    assert core.convert_ip_ranges_to_cidrs([(first_ip, last_ip)], ipv6=False) == [
+        "10.0.0.1/32", "10.0.0.2/31", "10.0.0.4/30", "10.0.0.8/30"
+    ]
+    assert core.convert_ip_ranges_to_cidrs([core.get_ip_range("2600:1f18::/56")],
+                                           ipv6=True) == ["2600:1f18::/56"]
+
+
+def test_verify_subnet_holes() -> None:
+    subnets = ["10.0.0.0/26"]
+
+    core.verify_subnet_holes("10.0.0.0/24", subnets, ["10.0.0.64/26", "10.0.0.128/25"])
+    core.verify_subnet_holes("10.0.0.0/24", [], ["10.0.0.0/24"])
+
+    # yapf: disable
+    test_cases = [
+        # Not minimal
+        (["10.0.0.64/26", "10.0.0.128/26", "10.0.0.192/26"],
+         "The available CIDR blocks '10.0.0.128/26' and '10.0.0.192/26' of '10.0.0.0/24' are not "
+         "minimal because they can be merged into '10.0.0.128/25'"),
+        # Incomplete
+        (["10.0.0.128/25"],
+         "The available CIDR blocks of '10.0.0.0/24' do not exactly cover its free address space"),
+        # Overlapping
+        (["10.0.0.64/26", "10.0.0.128/25", "10.0.0.128/26"],
+         "The available CIDR blocks of '10.0.0.0/24' do not exactly cover its free address space"),
+        # Overlapping a subnet
+        (["10.0.0.0/24"],
+         "The available CIDR blocks of '10.0.0.0/24' do not exactly cover its free address space")
+    ]
+    # yapf: enable
+
+    for holes, expected_message in test_cases:
+        with pytest.raises(ValueError) as wrapped_error:
+            core.verify_subnet_holes("10.0.0.0/24", subnets, holes)
+        assert str(wrapped_error.value) == expected_message
+
+
+def test_iter_subnet_cidr_gaps_verify() -> None:
+    vpc = VPC(id="vpc-1", name=None, cidrs=["10.0.0.0/16"], subnets=["10.0.0.0/24", "10.0.2.0/23"])
+
+    ((_, cidrs, _, _), ) = core.iter_subnet_cidr_gaps([vpc], prefix=None, verify=True)
+
+    assert cidrs == [
+        "10.0.1.0/24",
+        "10.0.4.0/22",
+        "10.0.8.0/21",
+        "10.0.16.0/20",
+        "10.0.32.0/19",
+        "10.0.64.0/18",
+        "10.0.128.0/17"
+    ]
+
+
+def test_iter_subnet_cidr_gaps_cache() -> None:
+    metrics = Metrics()
+    cache = ResultCache(metrics=metrics)
+    vpcs = [
+        VPC(id="vpc-1", name="first", cidrs=["10.0.0.0/16"], subnets=["10.0.0.0/17"]),
+        VPC(id="vpc-2", name="second", cidrs=["10.0.0.0/16"], subnets=["10.0.0.0/17"])
+    ]
+
+    first, second = core.iter_subnet_cidr_gaps(vpcs, prefix=8, cache=cache)
+
+    assert (metrics.cache_hits, metrics.cache_misses) == (1, 1)
+    assert first[1:3] == second[1:3] == ([], ["10.0.128.0/17"])
+    assert first[3] == [(
+        "Note: skipping the CIDR '10.0.128.0/17' in the VPC 'first' because its prefix (17) is "
+        "numerically greater than the requested prefix (8)"
+    )]
+    assert second[3] == [(
+        "Note: skipping the CIDR '10.0.128.0/17' in the VPC 'second' because its prefix (17) is "
+        "numerically greater than the requested prefix (8)"
+    )]
+
+    list(core.iter_subnet_cidr_gaps(vpcs, prefix=None, cache=cache))
+    list(core.iter_subnet_cidr_gaps(vpcs, prefix=None, cache=cache, verify=True))
+    assert (metrics.cache_hits, metrics.cache_misses) == (2, 2)
+
+
+def test_iter_prefix_breakdowns() -> None:
+    vpcs = [VPC(id="vpc-1", name="first", cidrs=["172.31.0.0/19"], subnets=["172.31.0.0/21"])]
+
+    results = list(
+        core.iter_prefix_breakdowns(core.iter_subnet_cidr_gaps(vpcs, prefix=None), [20, 21])
+    )
+
+    assert [(prefix, vpc.id) for prefix, vpc, _, _, _ in results] == [(20, "vpc-1"), (21, "vpc-1")]
+    assert results[0][2:4] == (["172.31.16.0/20"], ["172.31.8.0/21"])
+    assert results[1][2:] == (["172.31.8.0/21", "172.31.16.0/21", "172.31.24.0/21"], [], [])
+
+
+def test_find_subnet_holes_backends() -> None:
+    subnets = ["10.0.0.0/28", "10.0.0.64/26", "10.0.1.0/24"]
+
+    expected = ["10.0.0.16/28", "10.0.0.32/27", "10.0.0.128/25", "10.0.2.0/23"]
+    assert core.find_subnet_holes("10.0.0.0/22", subnets) == expected
+    assert core.find_subnet_holes("10.0.0.0/22", subnets, backend="bitmap") == expected
+    # Sparse VPC CIDR blocks fall back to the ranges backend
+    assert core.find_subnet_holes("2600:1f18::/56", ["2600:1f18::/128"], backend="bitmap") == \
+        core.find_subnet_holes("2600:1f18::/56", ["2600:1f18::/128"])
+
+    with pytest.raises(ValueError):
+        core.find_subnet_holes("10.0.0.0/22", subnets, backend="unknown")
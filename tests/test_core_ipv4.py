@@ -8,61 +8,6 @@ def _assert_lists_equal(expected: list[Any], actual: list[Any]) -> None:
     assert set(expected) == set(actual)
 
 
-def test_get_first_ip_in_next_cidr() -> None:
-    # yapf: disable
-    test_cases = [
-        ("172.0.0.0/32", "172.0.0.1"),
-        ("172.0.0.0/31", "172.0.0.2"),
-        ("172.0.0.0/20", "172.0.16.0")
-    ]
-    # yapf: enable
-
-    for cidr, expected in test_cases:
-        assert core._get_first_ip_in_next_cidr(cidr) == expected
-
-
-def test_get_last_ip_in_previous_cidr() -> None:
-    # yapf: disable
-    test_cases = [
-        ("172.0.0.0/32", "171.255.255.255"),
-        ("172.0.0.1/32", "172.0.0.0"),
-        ("172.0.0.0/31", "171.255.255.255"),
-        ("172.0.0.0/20", "171.255.255.255")
-    ]
-    # yapf: enable
-
-    for cidr, expected in test_cases:
-        assert core._get_last_ip_in_previous_cidr(cidr) == expected
-
-
-def test_get_previous_cidr_with_prefix() -> None:
-    # yapf: disable
-    test_cases = [
-        ("172.0.0.2/32", 31, "172.0.0.0/31"),
-        ("172.0.0.2/32", 32, "172.0.0.1/32"),
-        ("172.0.32.0/20", 19, "172.0.0.0/19"),
-        ("172.0.32.0/20", 21, None)  # Requesting a prefix that is higher than the given one
-    ]
-    # yapf: enable
-
-    for cidr, prefix, expected in test_cases:
-        assert core._get_previous_cidr_with_prefix(cidr, prefix) == expected
-
-
-def test_get_next_cidr_with_prefix() -> None:
-    # yapf: disable
-    test_cases = [
-        ("172.0.0.2/32", 31, "172.0.0.4/31"),
-        ("172.0.0.2/32", 32, "172.0.0.3/32"),
-        ("172.0.32.0/20", 19, "172.0.64.0/19"),
-        ("172.0.32.0/20", 21, None)  # Requesting a prefix that is higher than the given one
-    ]
-    # yapf: enable
-
-    for cidr, prefix, expected in test_cases:
-        assert core._get_next_cidr_with_prefix(cidr, prefix) == expected
-
-
 def test_cidrs_are_adjacent() -> None:
     true_test_cases = [
         ("172.31.224.0/20", "172.31.240.0/20"),
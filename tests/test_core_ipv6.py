@@ -8,61 +8,6 @@ def _assert_lists_equal(expected: list[Any], actual: list[Any]) -> None:
     assert set(expected) == set(actual)
 
 
-def test_get_first_ip_in_next_cidr() -> None:
-    # yapf: disable
-    test_cases = [
-        ("::/128", "::1"),
-        ("::/127", "::2"),
-        ("::/64", "0:0:0:1::"),
-    ]
-    # yapf: enable
-
-    for cidr, expected in test_cases:
-        assert core._get_first_ip_in_next_cidr(cidr) == expected
-
-
-def test_get_last_ip_in_previous_cidr() -> None:
-    # yapf: disable
-    test_cases = [
-        ("1::/128", "0:ffff:ffff:ffff:ffff:ffff:ffff:ffff"),
-        ("::1/128", "::"),
-        ("1::/127", "0:ffff:ffff:ffff:ffff:ffff:ffff:ffff"),
-        ("1::/64", "0:ffff:ffff:ffff:ffff:ffff:ffff:ffff")
-    ]
-    # yapf: enable
-
-    for cidr, expected in test_cases:
-        assert core._get_last_ip_in_previous_cidr(cidr) == expected
-
-
-def test_get_previous_cidr_with_prefix() -> None:
-    # yapf: disable
-    test_cases = [
-        ("::2/128", 127, "::/127"),
-        ("::2/128", 128, "::1/128"),
-        ("0:0:0:1::/128", 64, "::/64"),
-        ("::/55", 56, None)  # Requesting a prefix that is higher than the given one
-    ]
-    # yapf: enable
-
-    for cidr, prefix, expected in test_cases:
-        assert core._get_previous_cidr_with_prefix(cidr, prefix) == expected
-
-
-def test_get_next_cidr_with_prefix() -> None:
-    # yapf: disable
-    test_cases = [
-        ("::2/128", 127, "::4/127"),
-        ("::2/128", 128, "::3/128"),
-        ("::/64", 63, "0:0:0:2::/63"),
-        ("::/55", 56, None)  # Requesting a prefix that is higher than the given one
-    ]
-    # yapf: enable
-
-    for cidr, prefix, expected in test_cases:
-        assert core._get_next_cidr_with_prefix(cidr, prefix) == expected
-
-
 def test_cidrs_are_adjacent() -> None:
     true_test_cases = [
         ("::/64", "0:0:0:1::/64"),
@@ -0,0 +1,68 @@
+from aws_cidr_finder import diff
+from aws_cidr_finder.custom_types import VPC
+
+
+def test_diff_vpcs() -> None:
+    old = [
+        VPC(id="vpc-1", name="changed", cidrs=["10.0.0.0/16"], subnets=["10.0.0.0/17"]),
+        VPC(id="vpc-2", name="unchanged", cidrs=["10.1.0.0/16"], subnets=["10.1.0.0/24"]),
+        VPC(id="vpc-3", name="removed", cidrs=["10.2.0.0/16"], subnets=["10.2.0.0/17"])
+    ]
+    new = [
+        VPC(
+            id="vpc-1",
+            name="changed",
+            cidrs=["10.0.0.0/16", "2600:1f18::/56"],
+            subnets=["10.0.0.0/18", "10.0.128.0/24", "2600:1f18::/64"]
+        ),
+        VPC(id="vpc-2", name="unchanged", cidrs=["10.1.0.0/16"], subnets=["10.1.0.0/24"]),
+        VPC(id="vpc-4", name="added", cidrs=["10.3.0.0/16"], subnets=["10.3.0.0/17"])
+    ]
+
+    changes = [
+        diff.convert_to_json_format(*change) for change in diff.diff_vpcs(old, new, ipv6=False)
+    ]
+
+    # yapf: disable
+    assert changes == [
+        {
+            "id": "vpc-1",
+            "name": "changed",
+            "cidr": "10.0.0.0/16",
+            "status": "changed",
+            "freed_cidr_blocks": ["10.0.64.0/18"],
+            "consumed_cidr_blocks": ["10.0.128.0/24"]
+        },
+        {
+            "id": "vpc-4",
+            "name": "added",
+            "cidr": "10.3.0.0/16",
+            "status": "added",
+            "freed_cidr_blocks": ["10.3.128.0/17"],
+            "consumed_cidr_blocks": []
+        },
+        {
+            "id": "vpc-3",
+            "name": "removed",
+            "cidr": "10.2.0.0/16",
+            "status": "removed",
+            "freed_cidr_blocks": [],
+            "consumed_cidr_blocks": ["10.2.128.0/17"]
+        }
+    ]
+    # yapf: enable
+
+    ipv6_changes = list(diff.diff_vpcs(old, new, ipv6=True))
+    assert len(ipv6_changes) == 1
+    vpc, status, freed_cidrs, consumed_cidrs = ipv6_changes[0]
+    assert (vpc.cidr, status, consumed_cidrs) == ("2600:1f18::/56", "added", [])
+    assert freed_cidrs == [
+        "2600:1f18:0:1::/64",
+        "2600:1f18:0:2::/63",
+        "2600:1f18:0:4::/62",
+        "2600:1f18:0:8::/61",
+        "2600:1f18:0:10::/60",
+        "2600:1f18:0:20::/59",
+        "2600:1f18:0:40::/58",
+        "2600:1f18:0:80::/57"
+    ]
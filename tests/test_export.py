@@ -0,0 +1,56 @@
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+from aws_cidr_finder import export
+from aws_cidr_finder.custom_types import SingleCIDRVPC
+
+_VPC = SingleCIDRVPC(
+    id="vpc-1",
+    name="test-vpc1",
+    cidr="172.31.0.0/16",
+    subnets=["172.31.0.0/17"],
+    account="123456789012",
+    region="us-east-1"
+)
+
+
+def test_get_export_rows() -> None:
+    assert list(export.get_export_rows(_VPC, ["172.31.128.0/18", "172.31.192.0/24"])) == [
+        ("123456789012", "us-east-1", "vpc-1", "172.31.0.0/16", "172.31.128.0/18", 18, 16384),
+        ("123456789012", "us-east-1", "vpc-1", "172.31.0.0/16", "172.31.192.0/24", 24, 256)
+    ]
+
+
+def test_write_csv() -> None:
+    stream = StringIO()
+
+    export.write_csv([(_VPC, ["172.31.128.0/17"]), (_VPC, [])], stream)
+
+    assert stream.getvalue().splitlines() == [
+        "account,region,vpc_id,vpc_cidr,free_cidr,prefix,ip_count",
+        "123456789012,us-east-1,vpc-1,172.31.0.0/16,172.31.128.0/17,17,32768"
+    ]
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_write_columnar(tmp_path: Path, file_format: str) -> None:
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    ipv6_vpc = SingleCIDRVPC(id="vpc-2", name=None, cidr="2600:1f18::/56", subnets=[])
+    path = str(tmp_path / f"output.{file_format}")
+
+    results = [(_VPC, ["172.31.128.0/17"]), (_VPC, []), (ipv6_vpc, ["2600:1f18::/56"])]
+    export.write_columnar(results, path, file_format=file_format)
+
+    if file_format == "parquet":
+        table = pyarrow.parquet.read_table(path)
+    else:
+        table = pyarrow.ipc.open_file(path).read_all()
+    assert table.column_names == export.EXPORT_COLUMNS
+    assert table.column("free_cidr").to_pylist() == ["172.31.128.0/17", "2600:1f18::/56"]
+    assert [int(count) for count in table.column("ip_count").to_pylist()] == [32768, 2**72]
+    assert table.column("account").to_pylist() == ["123456789012", None]
@@ -0,0 +1,22 @@
+from aws_cidr_finder.metrics import Metrics
+
+
+def test_metrics() -> None:
+    metrics = Metrics()
+    assert metrics.to_dict() == {
+        "api_calls": 0, "retries": 0, "throttles": 0, "cache_hits": 0, "cache_misses": 0
+    }
+
+    metrics.record_api_call(retries=0)
+    metrics.record_api_call(retries=2)
+    metrics.record_throttle()
+    metrics.record_throttle()
+    metrics.record_cache_hit()
+    metrics.record_cache_miss()
+    metrics.record_cache_miss()
+
+    assert metrics.to_dict() == {
+        "api_calls": 2, "retries": 2, "throttles": 2, "cache_hits": 1, "cache_misses": 2
+    }
+    assert metrics.summary(
+    ) == ("api calls: 2, retries: 2, throttles: 2, cache hits: 1, cache misses: 2")
@@ -0,0 +1,40 @@
+import pstats
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+from aws_cidr_finder import core
+from aws_cidr_finder.profiling import profile_iterable, profile_phase, Profiler
+
+
+def test_profiler(tmp_path: Path) -> None:
+    profiler = Profiler()
+    stream = StringIO()
+    profiler.print_top(5, stream=stream)
+    assert stream.getvalue() == "No profile data was recorded.\n"
+
+    with profiler:
+        # Nested phases must not disable the profiler early
+        with profiler:
+            core.find_subnet_holes("10.0.0.0/16", ["10.0.0.0/24"])
+        core.sort_cidrs(["10.0.1.0/24", "10.0.0.0/24"])
+    assert list(profiler.iter_profiled(iter(["10.0.0.0/24"]))) == ["10.0.0.0/24"]
+
+    path = tmp_path / "profile.prof"
+    profiler.dump(str(path))
+    functions = {function for _, _, function in pstats.Stats(str(path)).stats}  # type: ignore
+    assert {"find_subnet_holes", "sort_cidrs"} <= functions
+
+    stream = StringIO()
+    profiler.print_top(3, stream=stream)
+    assert "List reduced from" in stream.getvalue()
+    with pytest.raises(ValueError):
+        profiler.print_top(-1, stream=stream)
+
+
+def test_profile_helpers_without_profiler() -> None:
+    items = [1, 2]
+    assert profile_iterable(items, None) is items
+    with profile_phase(None):
+        pass
@@ -1,7 +1,16 @@
+import pstats
+import subprocess
+import sys
+from pathlib import Path
+from typing import Union
+
+import pytest
 from pytest_mock import MockerFixture
 
-from aws_cidr_finder import find_available_cidrs
+from aws_cidr_finder import compute_available_cidrs, diff_available_cidrs, find_available_cidrs, \
+    iter_available_cidrs, Profiler, validate_cidrs, VPCCIDRResult, VPCData
 from aws_cidr_finder.custom_types import VPC
+from aws_cidr_finder.validation import CIDRProposal
 
 
 def test_find_available_cidrs_no_arguments(mocker: MockerFixture) -> None:
@@ -75,3 +84,196 @@ def test_find_available_cidrs_with_prefix(mocker: MockerFixture) -> None:
         ]
     }
     # yapf: enable
+
+
+def test_find_available_cidrs_backend(mocker: MockerFixture) -> None:
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None)
+    mocker.patch(
+        "aws_cidr_finder.__main__.BotoWrapper._get_vpc_data",
+        return_value=[
+            VPC(id="test1", name="test-vpc1", cidrs=["172.31.0.0/19"], subnets=["172.31.0.0/20"])
+        ]
+    )
+
+    assert find_available_cidrs(backend="bitmap") == find_available_cidrs()
+    assert [result.available_cidr_blocks
+            for result in iter_available_cidrs(backend="bitmap")] == [["172.31.16.0/20"]]
+    with pytest.raises(ValueError):
+        find_available_cidrs(backend="invalid")
+    with pytest.raises(ValueError):
+        iter_available_cidrs(backend="invalid")
+
+
+def test_find_available_cidrs_dual_stack_with_prefix(mocker: MockerFixture) -> None:
+    create_boto_wrapper_mock = mocker.patch("aws_cidr_finder._create_boto_wrapper")
+
+    with pytest.raises(ValueError):
+        find_available_cidrs(dual_stack=True, desired_prefix=24)
+    with pytest.raises(ValueError):
+        iter_available_cidrs(dual_stack=True, desired_prefix=64)
+    create_boto_wrapper_mock.assert_not_called()
+
+
+def test_iter_available_cidrs(mocker: MockerFixture) -> None:
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None)
+    mocker.patch(
+        "aws_cidr_finder.__main__.BotoWrapper._get_vpc_data",
+        return_value=[
+            VPC(
+                id="test1",
+                name="test-vpc1",
+                cidrs=["172.31.0.0/19"],
+                subnets=["172.31.0.0/20"],
+                account="123456789012",
+                region="us-east-1"
+            ),
+            VPC(id="test2", name=None, cidrs=["172.31.32.0/20"], subnets=["172.31.32.0/21"])
+        ]
+    )
+
+    results = iter_available_cidrs(desired_prefix=20)
+
+    first = next(results)
+    assert isinstance(first, VPCCIDRResult)
+    assert not hasattr(first, "__dict__")
+    assert first.readable_name == "test-vpc1"
+    assert (first.id, first.cidr, first.account,
+            first.region) == ("test1", "172.31.0.0/19", "123456789012", "us-east-1")
+    assert first.available_cidr_blocks == ["172.31.16.0/20"]
+    assert first.cidrs_not_converted_to_prefix == []
+    assert first.messages == []
+
+    second = next(results)
+    assert second.readable_name == "test2"
+    assert second.available_cidr_blocks == []
+    assert second.cidrs_not_converted_to_prefix == ["172.31.40.0/21"]
+    assert len(second.messages) == 1
+
+    assert next(results, None) is None
+
+
+def test_compute_available_cidrs() -> None:
+    vpcs: list[Union[VPC, VPCData]] = [
+        VPC(id="test1", name="test-vpc1", cidrs=["172.31.0.0/19"], subnets=["172.31.0.0/20"]),
+        {
+            "id": "test2",
+            "name": None,
+            "cidrs": ["172.31.32.0/20", "2600:1f18::/56"],
+            "subnets": ["172.31.32.0/21", "2600:1f18::/64"]
+        }
+    ]
+
+    # yapf: disable
+    assert compute_available_cidrs(vpcs) == {
+        "messages": [],
+        "cidrs_not_converted_to_prefix": [],
+        "data": [
+            {
+                "id": "test1",
+                "name": "test-vpc1",
+                "cidr": "172.31.0.0/19",
+                "available_cidr_blocks": ["172.31.16.0/20"]
+            },
+            {
+                "id": "test2",
+                "name": None,
+                "cidr": "172.31.32.0/20",
+                "available_cidr_blocks": ["172.31.40.0/21"]
+            }
+        ]
+    }
+    # yapf: enable
+
+    dual_stack_data = compute_available_cidrs(vpcs, ipv6=True, dual_stack=True)
+    assert [vpc["cidr"] for vpc in dual_stack_data["data"]
+            ] == ["172.31.0.0/19", "172.31.32.0/20", "2600:1f18::/56"]
+    with pytest.raises(ValueError):
+        compute_available_cidrs(vpcs, dual_stack=True, desired_prefix=24)
+
+    data = compute_available_cidrs(vpcs, ipv6=True, desired_prefix=58)
+
+    # yapf: disable
+    assert len(data["messages"]) == 6
+    assert data["cidrs_not_converted_to_prefix"] == [
+        "2600:1f18:0:1::/64", "2600:1f18:0:2::/63", "2600:1f18:0:4::/62", "2600:1f18:0:8::/61",
+        "2600:1f18:0:10::/60", "2600:1f18:0:20::/59"
+    ]
+    assert data["data"] == [
+        {
+            "id": "test2",
+            "name": None,
+            "cidr": "2600:1f18::/56",
+            "available_cidr_blocks": [
+                "2600:1f18:0:40::/58", "2600:1f18:0:80::/58", "2600:1f18:0:c0::/58"
+            ]
+        }
+    ]
+    # yapf: enable
+
+
+def test_compute_available_cidrs_with_profiler(tmp_path: Path) -> None:
+    profiler = Profiler()
+
+    vpcs: list[Union[VPC, VPCData]] = [
+        VPC(id="test1", name="test-vpc1", cidrs=["172.31.0.0/19"], subnets=["172.31.0.0/20"])
+    ]
+
+    compute_available_cidrs(vpcs, profiler=profiler)
+
+    path = tmp_path / "profile.prof"
+    profiler.dump(str(path))
+    functions = {function for _, _, function in pstats.Stats(str(path)).stats}  # type: ignore
+    assert "find_subnet_holes" in functions
+    # Only the computation is profiled, not the conversion of the results to JSON
+    assert "convert_to_json_format" not in functions
+
+
+def test_compute_available_cidrs_does_not_import_boto() -> None:
+    code = (
+        "import sys\n"
+        "from aws_cidr_finder import compute_available_cidrs\n"
+        "assert 'boto3' not in sys.modules and 'botocore' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_diff_available_cidrs() -> None:
+    old: list[Union[VPC, VPCData]] = [{
+        "id": "test1", "name": None, "cidrs": ["172.31.0.0/19"], "subnets": ["172.31.0.0/20"]
+    }]
+    new: list[Union[VPC, VPCData]
+              ] = [VPC(id="test1", name=None, cidrs=["172.31.0.0/19"], subnets=["172.31.16.0/20"])]
+
+    # yapf: disable
+    assert diff_available_cidrs(old, new) == [
+        {
+            "id": "test1",
+            "name": None,
+            "cidr": "172.31.0.0/19",
+            "status": "changed",
+            "freed_cidr_blocks": ["172.31.0.0/20"],
+            "consumed_cidr_blocks": ["172.31.16.0/20"]
+        }
+    ]
+    # yapf: enable
+    assert diff_available_cidrs(old, old) == []
+
+
+def test_validate_cidrs(mocker: MockerFixture) -> None:
+    mocker.patch("aws_cidr_finder.__main__.BotoWrapper.__init__", return_value=None)
+    mocker.patch(
+        "aws_cidr_finder.__main__.BotoWrapper._get_vpc_data",
+        return_value=[
+            VPC(id="test1", name=None, cidrs=["172.31.0.0/19"], subnets=["172.31.0.0/20"])
+        ]
+    )
+    proposals: list[CIDRProposal] = [{"vpc_id": "test1", "cidr": "172.31.0.0/21"}]
+
+    results = validate_cidrs(proposals, profile_name="test")
+
+    assert [result["overlapping_subnets"] for result in results] == [["172.31.0.0/20"]]
+    assert validate_cidrs(
+        proposals, vpcs=[{
+            "id": "test1", "name": None, "cidrs": ["172.31.0.0/19"], "subnets": []
+        }]
+    )[0]["valid"]
@@ -0,0 +1,87 @@
+from aws_cidr_finder import report
+from aws_cidr_finder.custom_types import SingleCIDRVPC
+
+
+def _vpc(id: str, cidr: str, account: str, region: str) -> SingleCIDRVPC:
+    return SingleCIDRVPC(id=id, name=None, cidr=cidr, subnets=[], account=account, region=region)
+
+
+def test_get_vpc_capacity() -> None:
+    # The first two CIDR blocks are adjacent, as are the last two, so there are two free fragments
+    stats = report.get_vpc_capacity(
+        _vpc("vpc-1", "172.31.0.0/16", "1", "us-east-1"),
+        ["172.31.16.1/32", "172.31.16.2/31", "172.31.96.0/19", "172.31.128.0/17"]
+    )
+
+    assert stats.to_json() == {
+        "total_ip_count": 65536,
+        "used_ip_count": 24573,
+        "free_ip_count": 40963,
+        "largest_free_block_ip_count": 32768,
+        "largest_free_fragment_ip_count": 40960,
+        "free_fragment_count": 2,
+        "fragmentation_index": 0.0001
+    }
+
+
+def test_get_vpc_capacity_single_fragment() -> None:
+    # Free space that is split into several CIDR blocks is not fragmented if they are contiguous
+    stats = report.get_vpc_capacity(
+        _vpc("vpc-1", "10.0.0.0/24", "1", "us-east-1"), ["10.0.0.64/26", "10.0.0.128/25"]
+    )
+
+    assert stats.largest_free_block_ip_count == 128
+    assert stats.largest_free_fragment_ip_count == 192
+    assert stats.free_fragment_count == 1
+    assert stats.fragmentation_index == 0.0
+
+
+def test_get_vpc_capacity_no_free_space() -> None:
+    stats = report.get_vpc_capacity(_vpc("vpc-1", "10.0.0.0/24", "1", "us-east-1"), [])
+
+    assert stats.used_ip_count == 256
+    assert stats.free_fragment_count == 0
+    assert stats.fragmentation_index == 0.0
+
+
+def test_capacity_report() -> None:
+    capacity_report = report.CapacityReport()
+    capacity_report.add_vpc(_vpc("vpc-1", "10.0.0.0/24", "1", "us-east-1"), ["10.0.0.128/25"])
+    capacity_report.add_vpc(
+        _vpc("vpc-2", "10.1.0.0/24", "1", "us-east-1"), ["10.1.0.0/26", "10.1.0.128/26"]
+    )
+    capacity_report.add_vpc(_vpc("vpc-3", "10.2.0.0/24", "2", "us-west-2"), [])
+
+    json = capacity_report.to_json()
+
+    assert [vpc["id"] for vpc in json["vpcs"]] == ["vpc-1", "vpc-2", "vpc-3"]
+    assert json["vpcs"][1]["capacity"]["free_fragment_count"] == 2
+    assert json["accounts"] == [{
+        "account": "1",
+        "region": "us-east-1",
+        "capacity": {
+            "total_ip_count": 512,
+            "used_ip_count": 256,
+            "free_ip_count": 256,
+            "largest_free_block_ip_count": 128,
+            "largest_free_fragment_ip_count": 128,
+            "free_fragment_count": 3,
+            "fragmentation_index": 0.5
+        }
+    },
+                                {
+                                    "account": "2",
+                                    "region": "us-west-2",
+                                    "capacity": {
+                                        "total_ip_count": 256,
+                                        "used_ip_count": 256,
+                                        "free_ip_count": 0,
+                                        "largest_free_block_ip_count": 0,
+                                        "largest_free_fragment_ip_count": 0,
+                                        "free_fragment_count": 0,
+                                        "fragmentation_index": 0.0
+                                    }
+                                }]
+    assert json["total"]["total_ip_count"] == 768
+    assert json["total"]["free_ip_count"] == 256
+    assert json["total"]["free_fragment_count"] == 3
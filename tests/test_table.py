@@ -0,0 +1,26 @@
+from aws_cidr_finder import table
+
+
+def test_get_column_widths() -> None:
+    assert table.get_column_widths("172.31.0.0/16") == (18, 10)
+    assert table.get_column_widths("10.0.0.0/28") == (18, 10)
+    assert table.get_column_widths("0.0.0.0/0") == (18, 10)
+    assert table.get_column_widths("2600:1f18::/56") == (43, 22)
+
+
+def test_render_table() -> None:
+    # yapf: disable
+    cidrs = ["172.31.96.0/19", "172.31.128.0/17"]
+    assert list(table.render_table(cidrs, vpc_cidr="172.31.0.0/16")) == [
+        "CIDR                  IP Count",
+        "------------------  ----------",
+        "172.31.96.0/19            8192",
+        "172.31.128.0/17          32768",
+        "Total                    40960"
+    ]
+    assert list(table.render_table([], vpc_cidr="2600:1f18::/120")) == [
+        "CIDR                                           IP Count",
+        "-------------------------------------------  ----------",
+        "Total                                                 0"
+    ]
+    # yapf: enable
@@ -0,0 +1,53 @@
+import json
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from aws_cidr_finder import topology
+from aws_cidr_finder.custom_types import VPC
+
+
+def test_save_and_load_topology(tmp_path: Path) -> None:
+    path = str(tmp_path / "topology.json")
+    vpcs = [
+        VPC(id="vpc-1", name="test", cidrs=["10.0.0.0/16"], subnets=["10.0.0.0/24"]),
+        VPC(id="vpc-2", name=None, cidrs=["10.1.0.0/16"], subnets=[])
+    ]
+
+    assert list(topology.save_topology(vpcs, path)) == vpcs
+
+    with open(path) as f:
+        assert json.load(f) == [topology.to_vpc_data(vpc) for vpc in vpcs]
+    loaded = topology.load_topology(path)
+    assert [topology.to_vpc_data(vpc)
+            for vpc in loaded] == [topology.to_vpc_data(vpc) for vpc in vpcs]
+    assert topology.to_vpc(vpcs[0]) is vpcs[0]
+
+
+def test_save_empty_topology(tmp_path: Path) -> None:
+    path = str(tmp_path / "topology.json")
+
+    assert list(topology.save_topology([], path)) == []
+    assert topology.load_topology(path) == []
+
+
+def test_save_topology_incomplete(tmp_path: Path) -> None:
+    path = str(tmp_path / "topology.json")
+    vpc = VPC(id="vpc-1", name="test", cidrs=["10.0.0.0/16"], subnets=[])
+    list(topology.save_topology([], path))
+
+    def fail_after_first_vpc() -> Iterator[VPC]:
+        yield vpc
+        raise RuntimeError("Retrieval failed")
+
+    with pytest.raises(RuntimeError):
+        list(topology.save_topology(fail_after_first_vpc(), path))
+    # Consumers that stop iterating early (e.g. because of --top) also leave no snapshot behind
+    vpcs = topology.save_topology([vpc, vpc], path)
+    assert next(vpcs) == vpc
+    vpcs.close()  # type: ignore[attr-defined]
+
+    # The previous snapshot is left untouched
+    assert list(tmp_path.iterdir()) == [tmp_path / "topology.json"]
+    assert topology.load_topology(path) == []
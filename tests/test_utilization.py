@@ -0,0 +1,76 @@
+from aws_cidr_finder import utilization
+from aws_cidr_finder.custom_types import SingleCIDRVPC, SubnetUsage
+
+
+def test_get_subnet_utilization() -> None:
+    stats = utilization.get_subnet_utilization(
+        SubnetUsage(id="subnet-1", cidr="10.0.0.0/24", available_ip_count=51)
+    )
+
+    assert stats.to_json() == {
+        "usable_ip_count": 251,
+        "used_ip_count": 200,
+        "available_ip_count": 51,
+        "utilization": 0.7968
+    }
+    assert stats.summary() == "200 of 251 usable IPs used (79.68%)"
+
+
+def test_get_vpc_utilization() -> None:
+    vpc = SingleCIDRVPC(
+        id="vpc-1",
+        name="test-vpc1",
+        cidr="10.0.0.0/16",
+        subnets=["10.0.0.0/24", "10.0.1.0/28"],
+        subnet_usage=[
+            SubnetUsage(id="subnet-1", cidr="10.0.0.0/24", available_ip_count=251),
+            SubnetUsage(id="subnet-2", cidr="10.0.1.0/28", available_ip_count=1)
+        ]
+    )
+
+    vpc_stats, subnet_stats = utilization.get_vpc_utilization(vpc)
+
+    assert vpc_stats.usable_ip_count == 262
+    assert vpc_stats.used_ip_count == 10
+    # The most utilized subnet comes first
+    assert [subnet.id for subnet, _ in subnet_stats] == ["subnet-2", "subnet-1"]
+    # yapf: disable
+    assert utilization.convert_to_json_format(vpc, vpc_stats, subnet_stats) == {
+        "id": "vpc-1",
+        "name": "test-vpc1",
+        "cidr": "10.0.0.0/16",
+        "account": None,
+        "region": None,
+        "utilization": {
+            "usable_ip_count": 262, "used_ip_count": 10, "available_ip_count": 252,
+            "utilization": 0.0382
+        },
+        "subnets": [
+            {
+                "id": "subnet-2",
+                "cidr": "10.0.1.0/28",
+                "utilization": {
+                    "usable_ip_count": 11, "used_ip_count": 10, "available_ip_count": 1,
+                    "utilization": 0.9091
+                }
+            },
+            {
+                "id": "subnet-1",
+                "cidr": "10.0.0.0/24",
+                "utilization": {
+                    "usable_ip_count": 251, "used_ip_count": 0, "available_ip_count": 251,
+                    "utilization": 0.0
+                }
+            }
+        ]
+    }
+    # yapf: enable
+
+
+def test_get_vpc_utilization_without_subnets() -> None:
+    vpc = SingleCIDRVPC(id="vpc-1", name=None, cidr="10.0.0.0/16", subnets=[], subnet_usage=[])
+
+    vpc_stats, subnet_stats = utilization.get_vpc_utilization(vpc)
+
+    assert vpc_stats.utilization == 0.0
+    assert subnet_stats == []
@@ -0,0 +1,75 @@
+from aws_cidr_finder import validation
+from aws_cidr_finder.custom_types import VPC
+
+
+def test_topology_index() -> None:
+    index = validation.TopologyIndex([
+        VPC(
+            id="vpc-1",
+            name=None,
+            cidrs=["10.0.0.0/16", "10.2.0.0/16"],
+            subnets=["10.0.0.0/24", "10.0.2.0/24", "10.0.4.0/22", "10.2.0.0/24"]
+        ),
+        VPC(id="vpc-1", name=None, cidrs=["2600:1f18::/56"], subnets=["2600:1f18::/64"])
+    ])
+
+    assert index.has_vpc("vpc-1")
+    assert not index.has_vpc("vpc-2")
+    assert index.find_vpc_cidr("vpc-1", "10.2.3.0/24") == "10.2.0.0/16"
+    assert index.find_vpc_cidr("vpc-1", "10.1.0.0/24") is None
+    assert index.find_vpc_cidr("vpc-1", "10.0.0.0/15") is None
+    assert index.find_vpc_cidr("vpc-1", "2600:1f18:0:1::/64") == "2600:1f18::/56"
+    assert index.find_overlapping_subnets("vpc-1", "10.0.0.0/21") == [
+        "10.0.0.0/24", "10.0.2.0/24", "10.0.4.0/22"
+    ]
+    assert index.find_overlapping_subnets("vpc-1", "10.0.5.0/24") == ["10.0.4.0/22"]
+    assert index.find_overlapping_subnets("vpc-1", "10.0.1.0/24") == []
+    assert index.find_overlapping_subnets("vpc-1", "2600:1f18::/60") == ["2600:1f18::/64"]
+    assert index.find_overlapping_subnets("vpc-2", "10.0.0.0/24") == []
+
+
+def test_validate_proposals() -> None:
+    index = validation.TopologyIndex([
+        VPC(id="vpc-1", name=None, cidrs=["10.0.0.0/16"], subnets=["10.0.0.0/24"]),
+        VPC(id="vpc-2", name=None, cidrs=["10.0.0.0/16"], subnets=[])
+    ])
+    proposals: list[validation.CIDRProposal] = [{
+        "vpc_id": "vpc-1", "cidr": "10.0.1.0/24"
+    }, {
+        "vpc_id": "vpc-1", "cidr": "10.0.0.0/23"
+    }, {
+        "vpc_id": "vpc-1", "cidr": "10.0.1.128/25"
+    }, {
+        "vpc_id": "vpc-2", "cidr": "10.0.1.0/24"
+    }, {
+        "vpc_id": "vpc-2", "cidr": "10.1.0.0/24"
+    }, {
+        "vpc_id": "vpc-3", "cidr": "10.0.0.0/24"
+    }, {
+        "vpc_id": "vpc-1", "cidr": "10.0.0.1/24"
+    }]
+
+    results = validation.validate_proposals(proposals, index)
+
+    assert [result["valid"]
+            for result in results] == [False, False, False, True, False, False, False]
+    # yapf: disable
+    assert results[1] == {
+        "vpc_id": "vpc-1",
+        "cidr": "10.0.0.0/23",
+        "valid": False,
+        "vpc_cidr": "10.0.0.0/16",
+        "overlapping_subnets": ["10.0.0.0/24"],
+        "overlapping_proposals": ["10.0.1.0/24", "10.0.1.128/25"],
+        "errors": [
+            "'10.0.0.0/23' overlaps existing subnets: 10.0.0.0/24",
+            "'10.0.0.0/23' overlaps other proposed CIDR blocks: 10.0.1.0/24, 10.0.1.128/25"
+        ]
+    }
+    # yapf: enable
+    assert results[0]["overlapping_proposals"] == ["10.0.0.0/23", "10.0.1.128/25"]
+    assert results[2]["overlapping_proposals"] == ["10.0.0.0/23", "10.0.1.0/24"]
+    assert results[3]["vpc_cidr"] == "10.0.0.0/16"
+    assert results[4]["errors"] == ["'10.1.0.0/24' is not inside any CIDR block of VPC 'vpc-2'"]
+    assert results[5]["errors"] == ["VPC 'vpc-3' was not found"]
+    assert results[6]["errors"] == ["'10.0.0.1/24' is not a valid CIDR block"]